@@ -0,0 +1,283 @@
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import pygame
+
+import tetris
+import tetris_bitboard
+import tetris_bot
+import tower_defense
+from snake_core import SnakeState
+
+# Fixed workloads; change them only together with the saved baselines
+TD_WAVES = (1, 10, 50)
+TD_TOWERS = 12
+TD_TICKS = 600
+TD_FILL_TICKS = 400  # fastest enemy needs ~470 ticks for the path, so nothing leaks while filling
+TETRIS_QUERIES = 20000
+TETRIS_BOARDS = 2000
+TETRIS_BOT_MOVES = 200
+SNAKE_GRIDS = ((20, 20), (500, 500))
+SNAKE_MOVES = 100000
+REGRESSION_THRESHOLD = 0.10
+
+
+class BenchResult(NamedTuple):
+    name: str
+    unit: str
+    ops: int                 # operations per repeat
+    best: float              # ops per second, fastest repeat
+    median: float            # ops per second, median repeat
+    p50_ms: Optional[float]  # per-operation latency where one op is big enough to time
+    p99_ms: Optional[float]
+
+
+def measure(name: str, unit: str, ops: int, setup: Callable[[], Callable[[], Optional[List[float]]]],
+            repeat: int) -> BenchResult:
+    """Time `repeat` fresh runs of one workload.
+
+    setup() builds the state outside the timed part and returns the run function;
+    run() may return per-operation times in seconds for the latency columns.
+    """
+    rates = []
+    latencies: List[float] = []
+    for _ in range(repeat):
+        run = setup()
+        start = time.perf_counter()
+        times = run()
+        elapsed = time.perf_counter() - start
+        rates.append(ops / elapsed)
+        if times:
+            latencies.extend(times)
+    p50 = p99 = None
+    if latencies:
+        latencies.sort()
+        p50 = latencies[len(latencies) // 2] * 1000
+        p99 = latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)] * 1000
+    return BenchResult(name, unit, ops, max(rates), statistics.median(rates), p50, p99)
+
+
+def td_setup(wave: int, towers: int = TD_TOWERS, ticks: int = TD_TICKS, seed: int = 0):
+    # A game in the middle of `wave`: its enemies spread along the path, towers built
+    def setup():
+        game = tower_defense.Game(headless=True, seed=seed)
+        rng = random.Random(seed)
+        layout = [(rng.randrange(0, tower_defense.WINDOW_WIDTH - 150),
+                   rng.randrange(0, tower_defense.WINDOW_HEIGHT),
+                   rng.choice(list(tower_defense.TOWER_TYPES))) for _ in range(towers)]
+        game.wave = wave
+        game.game_started = True
+        game.wave_in_progress = True
+        game.wave_countdown = tower_defense.WAVE_DURATION
+        game.lives = 10 ** 9
+        count = wave * 5
+        spawn_ticks = [i * TD_FILL_TICKS // count for i in range(count)]
+        spawned = 0
+        for tick in range(TD_FILL_TICKS):
+            while spawned < count and spawn_ticks[spawned] <= tick:
+                game.add_enemy(rng.choice(list(tower_defense.ENEMY_TYPES)) if wave >= 5 else 'Normal')
+                spawned += 1
+            for enemy in game.enemies:
+                enemy.move()
+        game.towers = [tower_defense.Tower(x, y, tower_type) for x, y, tower_type in layout]
+
+        def run():
+            times = []
+            clock = time.perf_counter
+            for _ in range(ticks):
+                start = clock()
+                game.update()
+                times.append(clock() - start)
+            return times
+        return run
+    return setup
+
+
+def tetris_workload(seed: int = 0) -> Tuple[List[list], List[Tuple[list, int, int]]]:
+    # Boards stacked to a random height with random holes, about every third row full
+    rng = random.Random(seed)
+    boards = []
+    for _ in range(TETRIS_BOARDS):
+        board = tetris.create_board()
+        height = rng.randrange(2, tetris.ROWS - 4)
+        for y in range(tetris.ROWS - height, tetris.ROWS):
+            full = rng.random() < 0.3
+            for x in range(tetris.COLS):
+                board[y][x] = 1 if full or rng.random() < 0.7 else 0
+        boards.append(board)
+    shapes = [shape for rotations in tetris.ROTATIONS.values() for shape in rotations]
+    queries = [(rng.choice(shapes), rng.randrange(-2, tetris.COLS), rng.randrange(-2, tetris.ROWS))
+               for _ in range(TETRIS_QUERIES)]
+    return boards, queries
+
+
+def tetris_valid_setup(backend, boards, queries):
+    def setup():
+        converted = [tetris_bitboard.from_rows(board) if backend is tetris_bitboard else board
+                     for board in boards]
+        is_valid_position = backend.is_valid_position
+        count = len(converted)
+
+        def run():
+            for i, (shape, x, y) in enumerate(queries):
+                is_valid_position(converted[i % count], shape, x, y)
+        return run
+    return setup
+
+
+def tetris_clear_setup(backend, boards):
+    def setup():
+        converted = [tetris_bitboard.from_rows(board) if backend is tetris_bitboard else board
+                     for board in boards]
+        clear_lines = backend.clear_lines
+
+        def run():
+            # clear_lines returns a new board, so every run sees the same input
+            for board in converted:
+                clear_lines(board)
+        return run
+    return setup
+
+
+def tetris_bot_setup(boards, lookahead: bool, seed: int = 0):
+    # Best move for a random piece on the first boards, with or without the next piece
+    rng = random.Random(seed)
+    pieces = [rng.choice(list(tetris.ROTATIONS)) for _ in range(TETRIS_BOT_MOVES + 1)]
+
+    def setup():
+        converted = [tetris_bitboard.from_rows(board) for board in boards[:TETRIS_BOT_MOVES]]
+        bot = tetris_bot.TetrisBot()
+
+        def run():
+            times = []
+            clock = time.perf_counter
+            for i, board in enumerate(converted):
+                start = clock()
+                bot.best_move(board, pieces[i], pieces[i + 1] if lookahead else None)
+                times.append(clock() - start)
+            return times
+        return run
+    return setup
+
+
+def cycle_directions(width: int, height: int) -> List[Tuple[int, int]]:
+    """Direction per cell of a Hamiltonian cycle, so the snake never runs into itself.
+
+    Row 0 runs right, rows below zigzag over columns 1..width-1, column 0 leads back up.
+    Needs an even height.
+    """
+    directions = []
+    for y in range(height):
+        for x in range(width):
+            if x == 0:
+                directions.append((0, -1) if y > 0 else (1, 0))
+            elif y == 0:
+                directions.append((1, 0) if x < width - 1 else (0, 1))
+            elif y % 2 == 1:
+                if x > 1:
+                    directions.append((-1, 0))
+                else:
+                    directions.append((0, 1) if y < height - 1 else (-1, 0))
+            else:
+                directions.append((1, 0) if x < width - 1 else (0, 1))
+    return directions
+
+
+def snake_setup(width: int, height: int, moves: int = SNAKE_MOVES, seed: int = 0):
+    directions = cycle_directions(width, height)
+
+    def setup():
+        rng = random.Random(seed)
+        state = SnakeState(width, height, rng)
+
+        def run():
+            nonlocal state
+            for _ in range(moves):
+                head_x, head_y = state.body[0]
+                if not state.step(directions[head_y * width + head_x]):
+                    # Only happens once the snake fills the whole board
+                    state = SnakeState(width, height, rng)
+        return run
+    return setup
+
+
+def run_all(repeat: int = 5) -> List[BenchResult]:
+    results = []
+    for wave in TD_WAVES:
+        results.append(measure(f"td_update_wave{wave}", "ticks", TD_TICKS, td_setup(wave), repeat))
+    boards, queries = tetris_workload()
+    for label, backend in (("list", tetris), ("bitboard", tetris_bitboard)):
+        results.append(measure(f"tetris_is_valid_position_{label}", "calls", len(queries),
+                               tetris_valid_setup(backend, boards, queries), repeat))
+        results.append(measure(f"tetris_clear_lines_{label}", "calls", len(boards),
+                               tetris_clear_setup(backend, boards), repeat))
+    for label, lookahead in (("", False), ("_lookahead", True)):
+        results.append(measure(f"tetris_bot_best_move{label}", "moves", TETRIS_BOT_MOVES,
+                               tetris_bot_setup(boards, lookahead), repeat))
+    for width, height in SNAKE_GRIDS:
+        results.append(measure(f"snake_step_{width}x{height}", "moves", SNAKE_MOVES,
+                               snake_setup(width, height), repeat))
+    return results
+
+
+def save_results(path: str, results: Sequence[BenchResult]):
+    data = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': sys.version.split()[0],
+        'pygame': pygame.version.ver,
+        'platform': platform.platform(),
+        'results': [result._asdict() for result in results],
+    }
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+
+
+def load_results(path: str) -> Dict[str, dict]:
+    with open(path) as f:
+        return {result['name']: result for result in json.load(f)['results']}
+
+
+def compare(old_path: str, new_path: str, threshold: float = REGRESSION_THRESHOLD) -> List[str]:
+    """Print old vs new median throughput; returns the names that got slower than threshold."""
+    old = load_results(old_path)
+    new = load_results(new_path)
+    regressions = []
+    for name, result in new.items():
+        if name not in old:
+            print(f"{name:<36} {result['median']:>14,.0f}  (new)")
+            continue
+        ratio = result['median'] / old[name]['median']
+        flag = ''
+        if ratio < 1 - threshold:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        print(f"{name:<36} {old[name]['median']:>14,.0f} -> {result['median']:>14,.0f}  {ratio:6.2f}x{flag}")
+    return regressions
+
+
+def print_results(results: Sequence[BenchResult]):
+    for result in results:
+        latency = ''
+        if result.p50_ms is not None:
+            latency = f"  p50 {result.p50_ms:.3f} ms  p99 {result.p99_ms:.3f} ms"
+        print(f"{result.name:<36} {result.median:>14,.0f} {result.unit}/s{latency}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless benchmarks for the game engines")
+    parser.add_argument("--output", default="benchmark_results.json", help="where to save the results")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--compare", metavar="BASELINE", help="compare the new results with a saved file")
+    args = parser.parse_args()
+
+    results = run_all(args.repeat)
+    print_results(results)
+    save_results(args.output, results)
+    if args.compare and compare(args.compare, args.output):
+        sys.exit(1)
@@ -0,0 +1,188 @@
+from typing import List, Tuple
+
+import numpy as np
+
+from tower_defense import ENEMY_TYPES, TARGETING
+
+# Enemy types as small ints so they fit into an array
+TYPE_NAMES = list(ENEMY_TYPES.keys())
+TYPE_IDS = {name: i for i, name in enumerate(TYPE_NAMES)}
+
+
+class EnemyView:
+    """Read/write view of one enemy slot, so drawing code can treat it like an Enemy."""
+
+    def __init__(self, batch: 'EnemyBatch', index: int):
+        self.batch = batch
+        self.index = index
+
+    @property
+    def x(self) -> float:
+        return float(self.batch.x[self.index])
+
+    @property
+    def y(self) -> float:
+        return float(self.batch.y[self.index])
+
+    @property
+    def path_index(self) -> int:
+        return int(self.batch.path_index[self.index])
+
+    @property
+    def progress(self) -> float:
+        return float(self.batch.progress[self.index])
+
+    @property
+    def health(self) -> float:
+        return float(self.batch.health[self.index])
+
+    @health.setter
+    def health(self, value: float):
+        self.batch.health[self.index] = value
+
+    @property
+    def max_health(self) -> float:
+        return float(self.batch.max_health[self.index])
+
+    @property
+    def speed(self) -> float:
+        return float(self.batch.speed[self.index])
+
+    @property
+    def value(self) -> int:
+        return int(self.batch.value[self.index])
+
+    @property
+    def type(self) -> str:
+        return TYPE_NAMES[self.batch.type_id[self.index]]
+
+    @property
+    def color(self):
+        return ENEMY_TYPES[self.type]['color']
+
+    @property
+    def size(self) -> int:
+        return ENEMY_TYPES[self.type]['size']
+
+
+class EnemyBatch:
+    """All enemies of a game as structure-of-arrays, moved with one vectorized step per tick.
+
+    Slots stay in spawn order, so index 0 is the oldest enemy just like self.enemies[0].
+    Views handed out by iteration are only valid until the next step().
+    """
+
+    def __init__(self, path: List[Tuple[int, int]], capacity: int = 64):
+        self.path = path
+        self.path_x = np.array([p[0] for p in path], dtype=np.float64)
+        self.path_y = np.array([p[1] for p in path], dtype=np.float64)
+        self.count = 0
+        self.x = np.zeros(capacity, dtype=np.float64)
+        self.y = np.zeros(capacity, dtype=np.float64)
+        self.path_index = np.zeros(capacity, dtype=np.int32)
+        self.progress = np.zeros(capacity, dtype=np.float64)
+        self.speed = np.zeros(capacity, dtype=np.float64)
+        self.health = np.zeros(capacity, dtype=np.float64)
+        self.max_health = np.zeros(capacity, dtype=np.float64)
+        self.value = np.zeros(capacity, dtype=np.int64)
+        self.type_id = np.zeros(capacity, dtype=np.int8)
+
+    def _arrays(self):
+        return ('x', 'y', 'path_index', 'progress', 'speed', 'health', 'max_health', 'value', 'type_id')
+
+    def _grow(self):
+        capacity = len(self.x) * 2
+        for name in self._arrays():
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def spawn(self, enemy_type: str) -> EnemyView:
+        if self.count == len(self.x):
+            self._grow()
+        i = self.count
+        info = ENEMY_TYPES[enemy_type]
+        self.x[i] = self.path[0][0]
+        self.y[i] = self.path[0][1]
+        self.path_index[i] = 0
+        self.progress[i] = 0.0
+        self.speed[i] = info['speed']
+        self.health[i] = info['health']
+        self.max_health[i] = info['health']
+        self.value[i] = info['value']
+        self.type_id[i] = TYPE_IDS[enemy_type]
+        self.count += 1
+        return EnemyView(self, i)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index: int) -> EnemyView:
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        return EnemyView(self, index)
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield EnemyView(self, i)
+
+    def step(self) -> Tuple[int, int]:
+        """Move every enemy one tick, drop leaked and dead ones.
+
+        Returns (leaked enemies, money earned from kills), with the same
+        rules as Enemy.move followed by the checks in Game.update.
+        """
+        n = self.count
+        if n == 0:
+            return 0, 0
+        x = self.x[:n]
+        y = self.y[:n]
+        idx = self.path_index[:n]
+        speed = self.speed[:n]
+
+        dx = self.path_x[idx + 1] - x
+        dy = self.path_y[idx + 1] - y
+        distance = np.sqrt(dx * dx + dy * dy)
+
+        # Close enough to the next waypoint: snap the index forward, position stays
+        arrived = distance < speed
+        idx[arrived] += 1
+        leaked = arrived & (idx >= len(self.path) - 1)
+
+        moving = ~arrived
+        x[moving] += (dx[moving] / distance[moving]) * speed[moving]
+        y[moving] += (dy[moving] / distance[moving]) * speed[moving]
+        self.progress[:n][moving] += speed[moving]
+
+        dead = ~leaked & (self.health[:n] <= 0)
+        leaked_count = int(np.count_nonzero(leaked))
+        earned = int(self.value[:n][dead].sum())
+        if leaked_count or earned or dead.any():
+            self._compact(~(leaked | dead))
+        return leaked_count, earned
+
+    def _compact(self, keep):
+        n = self.count
+        k = int(np.count_nonzero(keep))
+        for name in self._arrays():
+            arr = getattr(self, name)
+            arr[:k] = arr[:n][keep]
+        self.count = k
+
+    def target_in_range(self, x: float, y: float, radius: float, targeting: str = 'first') -> int:
+        """Index of the enemy within radius a tower with this targeting mode shoots, or -1.
+
+        Ties go to the oldest enemy, as argmax returns the lowest slot.
+        """
+        n = self.count
+        if n == 0:
+            return -1
+        dx = self.x[:n] - x
+        dy = self.y[:n] - y
+        in_range = dx * dx + dy * dy <= radius * radius
+        if not in_range.any():
+            return -1
+        attr, sign = TARGETING[targeting]
+        keys = np.where(in_range, sign * getattr(self, attr)[:n], -np.inf)
+        return int(np.argmax(keys))
@@ -0,0 +1,200 @@
+import heapq
+from typing import Iterable, List, Sequence, Tuple
+
+Tile = Tuple[int, int]
+INF = float('inf')
+
+
+def path_tiles(path: Sequence[Tuple[int, int]], cols: int, rows: int, tile_size: int) -> List[Tile]:
+    """Tiles a waypoint path runs through, from start to end."""
+    def tile_of(x, y):
+        return (min(int(x) // tile_size, cols - 1), min(int(y) // tile_size, rows - 1))
+
+    tiles = []
+    for (x1, y1), (x2, y2) in zip(path, path[1:]):
+        steps = max(abs(x2 - x1), abs(y2 - y1)) // (tile_size // 2) + 1
+        for step in range(steps + 1):
+            tile = tile_of(x1 + (x2 - x1) * step / steps, y1 + (y2 - y1) * step / steps)
+            if tile not in tiles:
+                tiles.append(tile)
+    return tiles
+
+
+class FlowField:
+    """Distance-to-exit and next-step table for every tile of a map.
+
+    Built once with a BFS from the goal tiles. Blocking a tile only recomputes the
+    tiles whose route went through it, so enemies always find their next step with
+    one lookup in next_tile, however many of them there are.
+    """
+
+    def __init__(self, cols: int, rows: int, tile_size: int, walkable: Iterable[Tile],
+                 spawn: Tile, goals: Sequence[Tile]):
+        self.cols = cols
+        self.rows = rows
+        self.tile_size = tile_size
+        self.spawn = spawn
+        self.walkable = bytearray(cols * rows)
+        for col, row in walkable:
+            self.walkable[row * cols + col] = 1
+        self.goals = [row * cols + col for col, row in goals]
+        self.goal_set = set(self.goals)
+        self.dist: List[float] = [INF] * (cols * rows)
+        self.next_tile: List[int] = [-1] * (cols * rows)
+        self.recompute()
+
+    @classmethod
+    def from_path(cls, path: Sequence[Tuple[int, int]], width: int, height: int, tile_size: int,
+                  open_field: bool = False) -> 'FlowField':
+        """Map for a waypoint path: only path tiles are walkable, or every tile with open_field
+        so towers can build a maze."""
+        cols, rows = width // tile_size, height // tile_size
+        route = path_tiles(path, cols, rows, tile_size)
+        if open_field:
+            walkable = [(col, row) for row in range(rows) for col in range(cols)]
+        else:
+            walkable = route
+        return cls(cols, rows, tile_size, walkable, route[0], [route[-1]])
+
+    def index(self, tile: Tile) -> int:
+        return tile[1] * self.cols + tile[0]
+
+    def tile_at(self, x: float, y: float) -> int:
+        col = min(max(int(x // self.tile_size), 0), self.cols - 1)
+        row = min(max(int(y // self.tile_size), 0), self.rows - 1)
+        return row * self.cols + col
+
+    def center(self, i: int) -> Tuple[float, float]:
+        half = self.tile_size / 2
+        return ((i % self.cols) * self.tile_size + half, (i // self.cols) * self.tile_size + half)
+
+    def neighbors(self, i: int) -> List[int]:
+        col, row = i % self.cols, i // self.cols
+        result = []
+        if row > 0:
+            result.append(i - self.cols)
+        if col < self.cols - 1:
+            result.append(i + 1)
+        if row < self.rows - 1:
+            result.append(i + self.cols)
+        if col > 0:
+            result.append(i - 1)
+        return result
+
+    def recompute(self):
+        self.dist = [INF] * (self.cols * self.rows)
+        for goal in self.goals:
+            if self.walkable[goal]:
+                self.dist[goal] = 0
+        self._relax([goal for goal in self.goals if self.walkable[goal]])
+
+    def _best_neighbor(self, i: int) -> int:
+        best = -1
+        for n in self.neighbors(i):
+            if self.walkable[n] and (best < 0 or self.dist[n] < self.dist[best]):
+                best = n
+        return best
+
+    def _relax(self, seeds: List[int]):
+        # Dijkstra from tiles with known distances; every step costs 1
+        heap = [(self.dist[i], i) for i in seeds]
+        heapq.heapify(heap)
+        changed = set(seeds)
+        while heap:
+            d, i = heapq.heappop(heap)
+            if d > self.dist[i]:
+                continue
+            for n in self.neighbors(i):
+                if self.walkable[n] and d + 1 < self.dist[n]:
+                    self.dist[n] = d + 1
+                    changed.add(n)
+                    heapq.heappush(heap, (d + 1, n))
+        # Next steps can only change on changed tiles and right next to them
+        touched = set(changed)
+        for i in changed:
+            touched.update(self.neighbors(i))
+        for i in touched:
+            self.next_tile[i] = -1 if i in self.goal_set else self._best_neighbor(i)
+
+    def _routed_through(self, tile: int) -> List[int]:
+        # All tiles whose next steps lead through `tile`, found by walking next_tile backwards
+        found = [tile]
+        seen = {tile}
+        for i in found:
+            for n in self.neighbors(i):
+                if n not in seen and self.next_tile[n] == i:
+                    seen.add(n)
+                    found.append(n)
+        return found
+
+    def block(self, tile: Tile):
+        i = self.index(tile)
+        if not self.walkable[i]:
+            return
+        self.walkable[i] = 0
+        affected = self._routed_through(i)
+        for a in affected:
+            self.dist[a] = INF
+        affected_set = set(affected)
+        seeds = set()
+        for a in affected:
+            for n in self.neighbors(a):
+                if n not in affected_set and self.dist[n] < INF:
+                    seeds.add(n)
+        self._relax(sorted(seeds))
+        # Enemies standing on the blocked tile still need a way out
+        for a in affected:
+            if self.dist[a] == INF:
+                self.next_tile[a] = self._best_neighbor(a)
+
+    def unblock(self, tile: Tile):
+        i = self.index(tile)
+        if self.walkable[i]:
+            return
+        self.walkable[i] = 1
+        if i in self.goal_set:
+            self.dist[i] = 0
+        else:
+            best = self._best_neighbor(i)
+            self.dist[i] = self.dist[best] + 1 if best >= 0 else INF
+        if self.dist[i] < INF:
+            self._relax([i])
+
+    def on_route(self, tile: Tile) -> bool:
+        """True if the spawn's current route to the exit passes through this tile.
+
+        Blocking any other tile leaves that route intact, so only these need can_block.
+        """
+        target = self.index(tile)
+        i = self.index(self.spawn)
+        for _ in range(self.cols * self.rows):
+            if i == target:
+                return True
+            if i < 0 or i in self.goal_set:
+                return False
+            i = self.next_tile[i]
+        return False
+
+    def can_block(self, tile: Tile) -> bool:
+        """True if the spawn still reaches an exit with this tile blocked."""
+        i = self.index(tile)
+        if not self.walkable[i]:
+            return True
+        if i in self.goal_set or i == self.index(self.spawn):
+            return False
+        self.block(tile)
+        reachable = self.dist[self.index(self.spawn)] < INF
+        self.unblock(tile)
+        return reachable
+
+    def next_step(self, x: float, y: float) -> Tuple[float, float, bool]:
+        """Center of the tile to walk to from (x, y), and whether that is the exit."""
+        i = self.tile_at(x, y)
+        if i in self.goal_set:
+            cx, cy = self.center(i)
+            return cx, cy, True
+        n = self.next_tile[i]
+        if n < 0:
+            n = i
+        cx, cy = self.center(n)
+        return cx, cy, False
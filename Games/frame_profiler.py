@@ -0,0 +1,164 @@
+import csv
+import json
+import os
+import time
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+import pygame
+
+import render_cache
+
+# Overlay on/off while a game runs
+TOGGLE_KEY = pygame.K_F3
+# Setting this to a file path profiles the games and writes the data there on exit
+PROFILE_ENV = 'GAMES_PROFILE'
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(sorted_samples: List[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_samples:
+        return 0.0
+    rank = max(int(len(sorted_samples) * p / 100.0 + 0.5) - 1, 0)
+    return sorted_samples[min(rank, len(sorted_samples) - 1)]
+
+
+class FrameProfiler:
+    """Per-frame phase timings for the game loops, kept in a ring buffer.
+
+    A loop calls begin_frame(), mark(phase) after each part of the frame and
+    end_frame() before waiting on the clock. mark() adds the time since the last
+    mark to that phase, so a phase may be marked several times per frame. Only the
+    last `capacity` frames are kept; the worst frame ever seen is kept on top.
+    """
+
+    def __init__(self, capacity: int = 600, dump_path: Optional[str] = None,
+                 visible: bool = False, refresh: int = 15):
+        self.capacity = capacity
+        self.dump_path = dump_path
+        self.visible = visible
+        self.refresh = refresh
+        self.phases: List[str] = []
+        self.samples: Dict[str, array] = {}
+        self.current: Dict[str, float] = {}
+        self.frames = 0
+        self.worst_frame = 0.0
+        self.worst_frame_index = -1
+        self.frame_start = 0.0
+        self.last_mark = 0.0
+        self.overlay: Optional[pygame.Surface] = None
+
+    @classmethod
+    def from_env(cls) -> Optional['FrameProfiler']:
+        """A profiler dumping to $GAMES_PROFILE, or None when the variable is not set."""
+        path = os.environ.get(PROFILE_ENV)
+        return cls(dump_path=path) if path else None
+
+    def _add_phase(self, phase: str):
+        self.phases.append(phase)
+        self.samples[phase] = array('d', [0.0] * self.capacity)
+        self.current[phase] = 0.0
+
+    def begin_frame(self):
+        self.frame_start = self.last_mark = time.perf_counter()
+        for phase in self.current:
+            self.current[phase] = 0.0
+
+    def mark(self, phase: str):
+        now = time.perf_counter()
+        if phase not in self.current:
+            self._add_phase(phase)
+        self.current[phase] += now - self.last_mark
+        self.last_mark = now
+
+    def end_frame(self):
+        now = time.perf_counter()
+        self.mark('frame')
+        self.current['frame'] = now - self.frame_start
+        slot = self.frames % self.capacity
+        for phase in self.phases:
+            self.samples[phase][slot] = self.current[phase]
+        if self.current['frame'] > self.worst_frame:
+            self.worst_frame = self.current['frame']
+            self.worst_frame_index = self.frames
+        self.frames += 1
+
+    def handle_event(self, event) -> bool:
+        """Toggle the overlay on the hotkey; True if the event was used."""
+        if event.type == pygame.KEYDOWN and event.key == TOGGLE_KEY:
+            self.visible = not self.visible
+            self.overlay = None
+            return True
+        return False
+
+    def recent(self, phase: str) -> List[float]:
+        """Samples of one phase for the kept frames, oldest first, in seconds."""
+        buffer = self.samples[phase]
+        if self.frames <= self.capacity:
+            return list(buffer[:self.frames])
+        start = self.frames % self.capacity
+        return list(buffer[start:]) + list(buffer[:start])
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """p50/p95/p99 and max per phase over the kept frames, in milliseconds."""
+        result = {}
+        for phase in self.phases:
+            samples = sorted(self.recent(phase))
+            stats = {f'p{p}': percentile(samples, p) * 1000 for p in PERCENTILES}
+            stats['max'] = (samples[-1] if samples else 0.0) * 1000
+            result[phase] = stats
+        return result
+
+    def _render_overlay(self) -> pygame.Surface:
+        font = render_cache.get_font(18)
+        lines = [f"{'phase':<10}{'p50':>7}{'p95':>7}{'p99':>7}  ms"]
+        for phase, stats in self.summary().items():
+            lines.append(f"{phase:<10}" + ''.join(f"{stats[f'p{p}']:7.2f}" for p in PERCENTILES))
+        lines.append(f"worst frame {self.worst_frame * 1000:.1f} ms (#{self.worst_frame_index})")
+        rendered = [font.render(line, True, (255, 255, 255)) for line in lines]
+        width = max(text.get_width() for text in rendered) + 8
+        height = sum(text.get_height() for text in rendered) + 8
+        overlay = pygame.Surface((width, height), pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, 170))
+        y = 4
+        for text in rendered:
+            overlay.blit(text, (4, y))
+            y += text.get_height()
+        return overlay
+
+    def draw_overlay(self, surface: pygame.Surface, pos: Tuple[int, int] = (5, 5)) -> Optional[pygame.Rect]:
+        """Draw the stats box if visible; returns the rect it covers."""
+        if not self.visible:
+            return None
+        # Sorting the ring buffer every frame would show up in the numbers themselves
+        if self.overlay is None or self.frames % self.refresh == 0:
+            self.overlay = self._render_overlay()
+        return surface.blit(self.overlay, pos)
+
+    def dump(self, path: str):
+        """Write the kept frames as CSV, or as JSON with the summary if path ends in .json."""
+        columns = [self.recent(phase) for phase in self.phases]
+        first = self.frames - len(columns[0]) if columns else 0
+        if path.endswith('.json'):
+            data = {
+                'frames': self.frames,
+                'worst_frame_ms': self.worst_frame * 1000,
+                'worst_frame_index': self.worst_frame_index,
+                'summary': self.summary(),
+                'samples_ms': {phase: [round(t * 1000, 4) for t in column]
+                               for phase, column in zip(self.phases, columns)},
+                'first_frame': first,
+            }
+            with open(path, 'w') as f:
+                json.dump(data, f, indent=2)
+            return
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['frame'] + [f'{phase}_ms' for phase in self.phases])
+            for i, row in enumerate(zip(*columns)):
+                writer.writerow([first + i] + [f'{t * 1000:.4f}' for t in row])
+
+    def close(self):
+        if self.dump_path:
+            self.dump(self.dump_path)
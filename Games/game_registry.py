@@ -0,0 +1,59 @@
+import importlib
+from typing import Iterable, List, NamedTuple, Tuple
+
+import pygame
+
+
+class GameEntry(NamedTuple):
+    name: str
+    module: str                 # imported on first launch, must have make_scene(screen)
+    size: Tuple[int, int]       # area of the window the game draws into
+    color: Tuple[int, int, int]
+
+
+GAMES: List[GameEntry] = [
+    GameEntry("Snake", "snake", (400, 400), (0, 200, 0)),
+    GameEntry("Tower Defense", "tower_defense", (800, 600), (200, 0, 0)),
+    GameEntry("Tetris", "tetris", (400, 600), (0, 0, 200)),
+]
+
+
+def find(name: str) -> GameEntry:
+    for entry in GAMES:
+        if entry.name == name:
+            return entry
+    raise KeyError(f"unknown game: {name}")
+
+
+def load(name: str):
+    """Import the game's module; only the first call for a game pays for the import."""
+    return importlib.import_module(find(name).module)
+
+
+def game_surface(display: pygame.Surface, size: Tuple[int, int]) -> pygame.Surface:
+    # Smaller games are centered in the window on a subsurface of the display
+    if display.get_size() == tuple(size):
+        return display
+    rect = pygame.Rect((0, 0), size)
+    rect.center = display.get_rect().center
+    return display.subsurface(rect)
+
+
+def make_scene(name: str, display: pygame.Surface):
+    """The game's first scene, drawing on the hub's display."""
+    entry = find(name)
+    module = load(name)
+    display.fill((0, 0, 0))
+    return module.make_scene(game_surface(display, entry.size))
+
+
+def to_local(surface: pygame.Surface, pos: Tuple[int, int]) -> Tuple[int, int]:
+    """Window coordinates (mouse events) to coordinates on a game surface."""
+    offset_x, offset_y = surface.get_abs_offset()
+    return pos[0] - offset_x, pos[1] - offset_y
+
+
+def update_display(surface: pygame.Surface, rects: Iterable[pygame.Rect]):
+    """pygame.display.update for rects given in the coordinates of a game surface."""
+    offset = surface.get_abs_offset()
+    pygame.display.update([pygame.Rect(rect).move(offset) for rect in rects])
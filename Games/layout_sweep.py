@@ -0,0 +1,73 @@
+import multiprocessing
+import os
+import random
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from tower_defense import Game, TOWER_TYPES, WINDOW_HEIGHT, WINDOW_WIDTH
+
+Layout = Sequence[Tuple[int, int, str]]
+
+
+class Job(NamedTuple):
+    job_id: int
+    layout: Layout
+    seed: int
+    ticks: int
+
+
+class JobResult(NamedTuple):
+    job_id: int
+    seed: int
+    waves_survived: int
+    money: int
+    lives_lost: int
+    ticks: int
+
+
+def run_job(job: Job) -> JobResult:
+    # Each job builds its own seeded game, so the result only depends on the job itself
+    game = Game(headless=True, seed=job.seed)
+    start_lives = game.lives
+    result = game.simulate(job.ticks, job.layout)
+    return JobResult(job.job_id, job.seed, result.wave - 1, result.money,
+                     start_lives - result.lives, result.ticks)
+
+
+def make_jobs(layouts: Iterable[Layout], seeds: Sequence[int], ticks: int) -> Iterator[Job]:
+    job_id = 0
+    for layout in layouts:
+        for seed in seeds:
+            yield Job(job_id, tuple(layout), seed, ticks)
+            job_id += 1
+
+
+def run_batch(jobs: Iterable[Job], processes: Optional[int] = None,
+              chunksize: int = 4) -> Iterator[JobResult]:
+    """Run jobs on a process pool and yield each result as soon as it is done.
+
+    Results arrive in completion order; use job_id to match them to their job.
+    """
+    processes = processes or os.cpu_count() or 1
+    if processes == 1:
+        for job in jobs:
+            yield run_job(job)
+        return
+    with multiprocessing.Pool(processes) as pool:
+        yield from pool.imap_unordered(run_job, jobs, chunksize)
+
+
+def random_layout(rng: random.Random, towers: int) -> List[Tuple[int, int, str]]:
+    names = list(TOWER_TYPES.keys())
+    return [(rng.randrange(0, WINDOW_WIDTH - 150), rng.randrange(0, WINDOW_HEIGHT), rng.choice(names))
+            for _ in range(towers)]
+
+
+if __name__ == "__main__":
+    rng = random.Random(0)
+    layouts = [random_layout(rng, 6) for _ in range(200)]
+    best = None
+    for result in run_batch(make_jobs(layouts, seeds=range(5), ticks=20000)):
+        print(result)
+        if best is None or (result.waves_survived, -result.lives_lost) > (best.waves_survived, -best.lives_lost):
+            best = result
+    print("Best:", best, layouts[best.job_id // 5])
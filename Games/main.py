@@ -1,7 +1,8 @@
 import pygame
-import snake
-import tower_defense
-import tetris
+import game_registry
+import render_cache
+from frame_profiler import FrameProfiler
+from scene_runtime import Runtime, Scene
 
 pygame.init()
 fenster = pygame.display.set_mode((800, 600))
@@ -13,45 +14,46 @@ class Button:
         self.farbe = farbe
         self.text = text
         self.text_farbe = text_farbe
-        self.font = pygame.font.Font(None, 36)
 
     def draw(self, surface):
         pygame.draw.rect(surface, self.farbe, self.rect)
-        text_surface = self.font.render(self.text, True, self.text_farbe)
+        text_surface = render_cache.render_text(self.text, 36, self.text_farbe)
         text_rect = text_surface.get_rect(center=self.rect.center)
         surface.blit(text_surface, text_rect)
 
     def is_clicked(self, pos):
         return self.rect.collidepoint(pos)
 
-button_snake = Button(rect=(300, 150, 200, 50), farbe=(0, 200, 0), text="Snake", text_farbe=(255, 255, 255))
-button_tower = Button(rect=(300, 250, 200, 50), farbe=(200, 0, 0), text="Tower Defense", text_farbe=(255, 255, 255))
-button_tetris = Button(rect=(300, 350, 200, 50), farbe=(0, 0, 200), text="Tetris", text_farbe=(255, 255, 255))
+class Hub(Scene):
+    idle = True
 
+    def __init__(self, screen):
+        super().__init__(screen)
+        # Ein Knopf pro Spiel aus der Registry; die Module werden erst beim Klick importiert
+        self.buttons = [Button(rect=(300, 150 + i * 100, 200, 50), farbe=spiel.color, text=spiel.name, text_farbe=(255, 255, 255))
+                        for i, spiel in enumerate(game_registry.GAMES)]
 
-running = True
-while running:
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-
+    def activate(self):
+        pygame.display.set_caption("Spiele")
 
+    def handle_event(self, event):
         if event.type == pygame.MOUSEBUTTONDOWN:
             pos = pygame.mouse.get_pos()
-            if button_snake.is_clicked(pos):
-                print("Snake starten ...")
-                snake.start_game()
-            elif button_tower.is_clicked(pos):
-                print("Tower Defense starten ...")
-                tower_defense.start_game()
-            elif button_tetris.is_clicked(pos):
-                print("Tetris starten ...")
-                tetris.start_game()
-
-    fenster.fill((0, 0, 0))
-    button_snake.draw(fenster)
-    button_tower.draw(fenster)
-    button_tetris.draw(fenster)
-    pygame.display.flip()
-
+            for button in self.buttons:
+                if button.is_clicked(pos):
+                    print(f"{button.text} starten ...")
+                    # Das Spiel läuft als Scene in diesem Fenster, danach geht es hier weiter
+                    self.runtime.push(game_registry.make_scene(button.text, self.screen))
+                    break
+
+    def draw(self):
+        self.screen.fill((0, 0, 0))
+        for button in self.buttons:
+            button.draw(self.screen)
+
+
+profiler = FrameProfiler.from_env()
+Runtime(profiler=profiler).run(Hub(fenster))
+if profiler is not None:
+    profiler.close()
 pygame.quit()
\ No newline at end of file
@@ -0,0 +1,85 @@
+import math
+from typing import List, Tuple
+
+import pygame
+
+
+class Projectile:
+    __slots__ = ('x', 'y', 'target', 'target_order', 'target_x', 'target_y',
+                 'speed', 'damage', 'splash_radius', 'color')
+
+    def __init__(self, x: float, y: float, target, speed: float, damage: float,
+                 splash_radius: float, color: Tuple[int, int, int]):
+        self.x = x
+        self.y = y
+        self.target = target
+        # Enemies are pooled, so remember which spawn we are actually chasing
+        self.target_order = target.spawn_order
+        self.target_x = target.x
+        self.target_y = target.y
+        self.speed = speed
+        self.damage = damage
+        self.splash_radius = splash_radius
+        self.color = color
+
+    def target_alive(self) -> bool:
+        return self.target.active and self.target.spawn_order == self.target_order
+
+    def move(self) -> bool:
+        """Fly toward the target; returns True on impact."""
+        if self.target_alive():
+            self.target_x = self.target.x
+            self.target_y = self.target.y
+        dx = self.target_x - self.x
+        dy = self.target_y - self.y
+        distance = math.sqrt(dx * dx + dy * dy)
+        if distance <= self.speed:
+            self.x = self.target_x
+            self.y = self.target_y
+            return True
+        self.x += dx / distance * self.speed
+        self.y += dy / distance * self.speed
+        return False
+
+    def bounds(self) -> pygame.Rect:
+        # The shot sprite: a circle of radius 4 around the position
+        return pygame.Rect(int(self.x) - 4, int(self.y) - 4, 9, 9)
+
+
+class ProjectileSystem:
+    """Projectiles in flight; impacts of one tick are resolved together after moving.
+
+    Splash impacts ask the spatial grid for the enemies around them, so their cost
+    depends on how crowded the impact point is, not on how many enemies exist.
+    """
+
+    def __init__(self, grid):
+        self.grid = grid
+        self.projectiles: List[Projectile] = []
+
+    def __len__(self) -> int:
+        return len(self.projectiles)
+
+    def fire(self, tower, target):
+        self.projectiles.append(Projectile(tower.x, tower.y, target, tower.projectile_speed,
+                                           tower.damage, tower.splash_radius, tower.color))
+
+    def update(self):
+        impacts = []
+        kept = 0
+        projectiles = self.projectiles
+        for i in range(len(projectiles)):
+            projectile = projectiles[i]
+            if projectile.move():
+                impacts.append(projectile)
+            else:
+                projectiles[kept] = projectile
+                kept += 1
+        del projectiles[kept:]
+
+        for projectile in impacts:
+            if projectile.splash_radius > 0:
+                for enemy in self.grid.in_radius(projectile.x, projectile.y, projectile.splash_radius):
+                    enemy.health -= projectile.damage
+            elif projectile.target_alive():
+                projectile.target.health -= projectile.damage
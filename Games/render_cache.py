@@ -0,0 +1,62 @@
+import pygame
+from collections import OrderedDict
+from typing import Callable, Hashable, Tuple
+
+RANGE_COLOR = (100, 100, 100, 50)
+
+
+class LRUCache:
+    """Small dict with a size limit that throws out the least recently used entry."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.entries: 'OrderedDict[Hashable, object]' = OrderedDict()
+
+    def get_or_create(self, key: Hashable, create: Callable[[], object]):
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            return entry
+        entry = create()
+        self.entries[key] = entry
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        self.entries.clear()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+fonts = LRUCache(16)
+texts = LRUCache(256)
+range_circles = LRUCache(32)
+
+
+def get_font(size: int) -> pygame.font.Font:
+    return fonts.get_or_create(size, lambda: pygame.font.Font(None, size))
+
+
+def render_text(text: str, size: int, color: Tuple[int, ...]) -> pygame.Surface:
+    # The returned surface is shared, callers must only blit it and never draw on it
+    return texts.get_or_create((text, size, color),
+                               lambda: get_font(size).render(text, True, color))
+
+
+def range_circle(radius: float, color: Tuple[int, int, int, int] = RANGE_COLOR) -> pygame.Surface:
+    radius = int(radius)
+
+    def create():
+        surface = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+        pygame.draw.circle(surface, color, (radius, radius), radius)
+        return surface
+
+    return range_circles.get_or_create((radius, color), create)
+
+
+def clear():
+    fonts.clear()
+    texts.clear()
+    range_circles.clear()
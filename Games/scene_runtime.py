@@ -0,0 +1,215 @@
+import time
+from typing import List, Optional, Tuple
+
+import pygame
+
+from frame_profiler import FrameProfiler
+from game_registry import update_display
+
+TICK_RATE = 60       # fixed simulation updates per second
+FPS = 60             # default frame limit
+MAX_STEPS = 5        # updates per frame and unit of speed before the backlog is dropped
+UPDATE_BUDGET = 0.75 # share of a frame the updates may take before the backlog is dropped
+IDLE_WAIT_MS = 500   # longest an idle scene blocks in event.wait()
+
+
+class Scene:
+    """One screen of a game: a menu, the gameplay, a game-over screen.
+
+    The runtime feeds events to handle_event(), calls update() TICK_RATE times per
+    second and draw() once per frame. draw() returns None when it redrew the whole
+    screen (the runtime flips) or the rects it changed, in screen coordinates.
+    Scenes with idle = True only change on input, so the runtime sleeps in
+    event.wait() instead of drawing frames while one of them is on top.
+    speed runs that many updates per tick of real time (None: as many as fit
+    into the frame), still drawing once per frame.
+    """
+
+    fps: Optional[int] = None
+    idle = False
+    speed: Optional[int] = 1
+    overlay_pos: Tuple[int, int] = (5, 5)
+
+    def __init__(self, screen: pygame.Surface):
+        self.screen = screen
+        self.runtime: Optional['Runtime'] = None
+
+    def activate(self):
+        """Called whenever the scene becomes the top of the stack."""
+
+    def handle_event(self, event):
+        pass
+
+    def update(self):
+        pass
+
+    def draw(self) -> Optional[List[pygame.Rect]]:
+        return None
+
+    def invalidate(self, rect: pygame.Rect):
+        """Repaint this area on the next draw(); only needed by scenes returning rects."""
+
+    def close(self):
+        """Called once when the scene leaves the stack, to release threads or files."""
+
+
+class Runtime:
+    """Scene stack with one loop for every screen: event dispatch, fixed-step updates, frame pacing.
+
+    Closing the window ends the whole stack. With a FrameProfiler each frame is timed
+    in events/update/draw and the overlay is drawn on top of the scene.
+    """
+
+    def __init__(self, fps: int = FPS, tick_rate: int = TICK_RATE,
+                 profiler: Optional[FrameProfiler] = None):
+        self.fps = fps
+        self.step_ms = 1000.0 / tick_rate
+        self.profiler = profiler
+        self.stack: List[Scene] = []
+        self.clock = pygame.time.Clock()
+        self.accumulator = 0.0
+        self.running = False
+        self.redraw = True
+        self.overlay_rect: Optional[pygame.Rect] = None
+
+    @property
+    def top(self) -> Optional[Scene]:
+        return self.stack[-1] if self.stack else None
+
+    def _changed(self):
+        self.redraw = True
+        self.overlay_rect = None
+        if self.stack:
+            self.stack[-1].activate()
+
+    def push(self, scene: Scene):
+        scene.runtime = self
+        self.stack.append(scene)
+        self._changed()
+
+    def pop(self, scene: Optional[Scene] = None):
+        """Remove the top scene, or `scene` and everything above it."""
+        if scene is None:
+            scene = self.top
+        if scene in self.stack:
+            index = self.stack.index(scene)
+            removed = self.stack[index:]
+            del self.stack[index:]
+            self._close(removed)
+            self._changed()
+
+    def replace(self, scene: Scene):
+        if self.stack:
+            self._close([self.stack.pop()])
+        self.push(scene)
+
+    def quit(self):
+        removed = self.stack[:]
+        self.stack.clear()
+        self._close(removed)
+        self.running = False
+
+    @staticmethod
+    def _close(scenes: List[Scene]):
+        for scene in reversed(scenes):
+            scene.close()
+
+    def dispatch(self, event):
+        if self.profiler is not None and self.profiler.handle_event(event):
+            self.redraw = True
+            return
+        if event.type == pygame.QUIT:
+            self.quit()
+            return
+        if self.stack:
+            self.stack[-1].handle_event(event)
+
+    def run(self, scene: Optional[Scene] = None):
+        """Run until the stack is empty or the window is closed."""
+        if scene is not None:
+            self.push(scene)
+        self.running = True
+        while self.running and self.stack:
+            self.frame()
+
+    def sleeping(self, scene: Scene) -> bool:
+        overlay = self.profiler is not None and self.profiler.visible
+        return scene.idle and not self.redraw and not overlay
+
+    def wait_events(self, scene: Scene) -> List[pygame.event.Event]:
+        if self.sleeping(scene):
+            # Nothing to animate: block until input, and restart the clock so no steps pile up
+            first = pygame.event.wait(IDLE_WAIT_MS)
+            self.clock.tick()
+            self.accumulator = 0.0
+            if first.type == pygame.NOEVENT:
+                return []
+            self.redraw = True
+            return [first] + pygame.event.get()
+        # Clock.tick sleeps away the rest of the frame
+        self.accumulator += self.clock.tick(scene.fps or self.fps) * (scene.speed or 1)
+        return pygame.event.get()
+
+    def run_updates(self) -> int:
+        """Run the fixed steps that are due, within the frame's time budget.
+
+        A scene that cannot keep up loses its backlog instead of delaying the next
+        frame, so high speeds degrade to whatever the machine manages while input
+        and drawing keep their pace.
+        """
+        scene = self.stack[-1]
+        speed = scene.speed
+        deadline = time.perf_counter() + UPDATE_BUDGET / (scene.fps or self.fps)
+        limit = MAX_STEPS * speed if speed is not None else None
+        steps = 0
+        while speed is None or self.accumulator >= self.step_ms:
+            scene.update()
+            self.accumulator -= self.step_ms
+            steps += 1
+            if not self.stack or self.stack[-1] is not scene:
+                break
+            if steps == limit or time.perf_counter() >= deadline:
+                break
+        if speed is None or self.accumulator >= self.step_ms:
+            # Too slow to keep up: drop the backlog instead of spiralling
+            self.accumulator = 0.0
+        return steps
+
+    def frame(self):
+        profiler = self.profiler
+        events = self.wait_events(self.stack[-1])
+        if profiler is not None:
+            profiler.begin_frame()
+        for event in events:
+            self.dispatch(event)
+            if not self.running:
+                return
+        if profiler is not None:
+            profiler.mark('events')
+
+        self.run_updates()
+        if profiler is not None:
+            profiler.mark('update')
+        if not self.stack:
+            return
+
+        scene = self.stack[-1]
+        if self.sleeping(scene):
+            return
+        self.redraw = False
+        if self.overlay_rect is not None:
+            scene.invalidate(self.overlay_rect)
+        rects = scene.draw()
+        self.overlay_rect = None
+        if profiler is not None:
+            self.overlay_rect = profiler.draw_overlay(scene.screen, scene.overlay_pos)
+        if rects is None:
+            pygame.display.flip()
+        else:
+            if self.overlay_rect is not None:
+                rects.append(self.overlay_rect)
+            if rects:
+                update_display(scene.screen, rects)
+        if profiler is not None:
+            profiler.mark('draw')
+            profiler.end_frame()
@@ -0,0 +1,83 @@
+import collections
+import threading
+import time
+from typing import Callable, Deque, Generic, Optional, Tuple, TypeVar
+
+Snapshot = TypeVar('Snapshot')
+
+MAX_CATCH_UP = 5  # ticks the thread may run back to back before it drops the backlog
+
+
+class SnapshotBuffer(Generic[Snapshot]):
+    """Double buffer of the last two published snapshots.
+
+    The writer replaces the (previous, current) pair with one attribute assignment
+    and readers read it with one attribute lookup, both atomic in CPython, so neither
+    side ever locks or sees half an update. Snapshots must be immutable.
+    """
+
+    def __init__(self):
+        self.pair: Tuple[Optional[Snapshot], Optional[Snapshot]] = (None, None)
+
+    def publish(self, snapshot: Snapshot):
+        # Single writer: only the simulation thread publishes
+        self.pair = (self.pair[1], snapshot)
+
+    def latest(self) -> Tuple[Optional[Snapshot], Optional[Snapshot]]:
+        return self.pair
+
+
+class SimulationThread(threading.Thread):
+    """Runs step() at a fixed rate on its own thread and publishes snapshot() after each tick.
+
+    The render thread never touches the simulation: it reads snapshots from
+    `buffer` and hands input over with send(), which queues a callable that runs on
+    this thread between two ticks. The tick sequence is therefore the same as in
+    the single-threaded loop, however the rendering hitches.
+    """
+
+    def __init__(self, step: Callable[[], None], snapshot: Callable[[float], Snapshot],
+                 tick_rate: int = 60, speed: Callable[[], Optional[int]] = lambda: 1):
+        super().__init__(daemon=True)
+        self.step = step
+        self.snapshot = snapshot
+        self.period = 1.0 / tick_rate
+        self.speed = speed
+        self.buffer: SnapshotBuffer[Snapshot] = SnapshotBuffer()
+        self.inbox: Deque[Callable[[], None]] = collections.deque()
+        self.stopping = threading.Event()
+        self.ticks = 0
+        self.buffer.publish(snapshot(time.perf_counter()))
+
+    def send(self, command: Callable[[], None]):
+        # deque.append/popleft are thread safe, no lock needed
+        self.inbox.append(command)
+
+    def stop(self):
+        self.stopping.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join()
+
+    def run(self):
+        next_tick = time.perf_counter()
+        while not self.stopping.is_set():
+            while self.inbox:
+                self.inbox.popleft()()
+            speed = self.speed()
+            # Fast-forward runs several steps per tick; "max" yields between bursts
+            for _ in range(speed or 8):
+                self.step()
+                self.ticks += 1
+            now = time.perf_counter()
+            self.buffer.publish(self.snapshot(now))
+            if speed is None:
+                time.sleep(0)
+                next_tick = now
+                continue
+            next_tick += self.period
+            delay = next_tick - now
+            if delay > 0:
+                self.stopping.wait(delay)
+            elif -delay > MAX_CATCH_UP * self.period:
+                # Too far behind: drop the backlog instead of spiralling
+                next_tick = now
@@ -1,200 +1,224 @@
 import pygame
-import random
+import render_cache
+from frame_profiler import FrameProfiler
+from game_registry import to_local
+from scene_runtime import Runtime, Scene, TICK_RATE
+from snake_core import SnakeState
 
-from tetris import CELL_SIZE
-
-pygame.init()
 GRID_WIDTH = 20
 GRID_HEIGHT = 20
 CELL_SIZE = 20
 SCREEN_WIDTH = 400
 SCREEN_HEIGHT = 400
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-
-pygame.display.set_caption("Snake")
-clock = pygame.time.Clock()
-FONT = pygame.font.Font(None, 36)
+MOVE_TICKS = TICK_RATE * 150 // 1000  # one move every 150 ms
 
 score = 0
 high_score = 0
 
 class Button:
-    def __init__(self, rect, color, text, text_color, font):
+    def __init__(self, rect, color, text, text_color, font_size):
         self.rect = pygame.Rect(rect)
         self.color = color
         self.text = text
         self.text_color = text_color
-        self.font = font
+        self.font_size = font_size
 
     def draw(self, surface):
         pygame.draw.rect(surface, self.color, self.rect)
-        text_surface = self.font.render(self.text, True, self.text_color)
+        text_surface = render_cache.render_text(self.text, self.font_size, self.text_color)
         text_rect = text_surface.get_rect(center=self.rect.center)
         surface.blit(text_surface, text_rect)
 
     def is_clicked(self, pos):
         return self.rect.collidepoint(pos)
 
-def draw_grid():
-    for x in range(0, SCREEN_WIDTH, CELL_SIZE):
-        pygame.draw.line(screen, (40, 40, 40), (x, 0), (x, SCREEN_HEIGHT))
-    for y in range(0, SCREEN_HEIGHT, CELL_SIZE):
-        pygame.draw.line(screen, (40, 40, 40), (0, y), (SCREEN_WIDTH, y))
-
-def main_menu():
-    menu_font = pygame.font.Font(None, 48)
-    small_font = pygame.font.Font(None, 24)
-    title_text = menu_font.render("Snake", True, (0, 255, 0))
-    start_button = Button((SCREEN_WIDTH//2 - 50, 200, 100, 50), (0, 200, 0), "Start", (255, 255, 255), small_font)
-    highscore_button = Button((SCREEN_WIDTH//2 - 50, 270, 100, 50), (0, 0, 200), "High Scores", (255, 255, 255), small_font)
-
-    menu_active = True
-    while menu_active:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                exit()
-            elif event.type == pygame.MOUSEBUTTONDOWN:
-                if start_button.is_clicked(event.pos):
-                    menu_active = False
-                elif highscore_button.is_clicked(event.pos):
-                    show_high_scores()
-
-        screen.fill((0, 0, 0))
-        screen.blit(title_text, (SCREEN_WIDTH//2 - title_text.get_width()//2, 100))
-        start_button.draw(screen)
-        highscore_button.draw(screen)
-        pygame.display.flip()
-        clock.tick(60)
-
-
-def show_high_scores():
-    global high_score
-    info_font = pygame.font.Font(None, 36)
-    active = True
-    while active:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                exit()
-            elif event.type in (pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN):
-                active = False
-        screen.fill((50, 50, 50))
-        hs_text = info_font.render(f"High Score: {high_score}", True, (255, 255, 255))
-        screen.blit(hs_text, (SCREEN_WIDTH // 2 - hs_text.get_width() // 2, SCREEN_HEIGHT // 2))
-        pygame.display.flip()
-        clock.tick(60)
-
-
-def game_over_screen(score):
-    global high_score
-    game_over_font = pygame.font.Font(None, 48)
-    info_font = pygame.font.Font(None, 24)
-    game_over_text = game_over_font.render("Game Over", True, (255, 0, 0))
-    score_text = info_font.render(f"Score: {score}", True, (255, 255, 255))
-    restart_button = Button((SCREEN_WIDTH // 2 - 50, 250, 100, 50), (0, 200, 0), "Restart", (255, 255, 255), info_font)
-    menu_button = Button((SCREEN_WIDTH // 2 - 50, 320, 100, 50), (0, 0, 200), "Menu", (255, 255, 255), info_font)
-
-    waiting = True
-    while waiting:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                exit()
-            elif event.type == pygame.MOUSEBUTTONDOWN:
-                if restart_button.is_clicked(event.pos):
-                    return "restart"
-                elif menu_button.is_clicked(event.pos):
-                    return "menu"
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_r:
-                    return "restart"
-                elif event.key == pygame.K_m:
-                    return "menu"
-
-        screen.fill((0, 0, 0))
-        screen.blit(game_over_text, (SCREEN_WIDTH // 2 - game_over_text.get_width() // 2, 150))
-        screen.blit(score_text, (SCREEN_WIDTH // 2 - score_text.get_width() // 2, 210))
-        restart_button.draw(screen)
-        menu_button.draw(screen)
-        pygame.display.flip()
-        clock.tick(60)
-
-
-def run_game():
-    global score, high_score
-    score = 0
-    snake = [(GRID_WIDTH // 2, GRID_HEIGHT // 2)]
-    direction = (0, -1)
-    apple = (random.randint(0, GRID_WIDTH - 1), random.randint(0, GRID_HEIGHT - 1))
-
-    MOVE_EVENT = pygame.USEREVENT + 1
-    pygame.time.set_timer(MOVE_EVENT, 150)
-    running = True
-
-    while running:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-
-            elif event.type == MOVE_EVENT:
-                head_x, head_y = snake[0]
-                dx, dy = direction
-                new_head = (head_x + dx, head_y + dy)
-
-                if (new_head[0] < 0 or new_head[0] >= GRID_WIDTH or
-                        new_head[1] < 0 or new_head[1] >= GRID_HEIGHT or
-                        new_head in snake):
-                    running = False
-                    continue
-
-                snake.insert(0, new_head)
-                if new_head == apple:
-                    score += 1
-                    while apple in snake:
-                        apple = (random.randint(0, GRID_WIDTH - 1), random.randint(0, GRID_HEIGHT - 1))
-                else:
-                    snake.pop()
-
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_UP and direction != (0, 1):
-                    direction = (0, -1)
-                elif event.key == pygame.K_DOWN and direction != (0, -1):
-                    direction = (0, 1)
-                elif event.key == pygame.K_LEFT and direction != (1, 0):
-                    direction = (-1, 0)
-                elif event.key == pygame.K_RIGHT and direction != (-1, 0):
-                    direction = (1, 0)
-
-        screen.fill((0, 0, 0))
-        draw_grid()
-
-        apple_rect = pygame.Rect(apple[0] * CELL_SIZE, apple[1] * CELL_SIZE, CELL_SIZE, CELL_SIZE)
-        pygame.draw.rect(screen, (255, 0, 0), apple_rect)
-
-        for segment in snake:
-            seg_rect = pygame.Rect(segment[0] * CELL_SIZE, segment[1] * CELL_SIZE, CELL_SIZE, CELL_SIZE)
-            pygame.draw.rect(screen, (0, 255, 0), seg_rect)
-
-        pygame.display.flip()
-        clock.tick(60)
-
-    if score > high_score:
-        high_score = score
-    return score
-
-
-def start_game():
-    while True:
-        pygame.display.set_mode((400, 400))
-        main_menu()
-        current_score = run_game()
-        option = game_over_screen(current_score)
-        if option == "menu":
-            continue
-        elif option == "restart":
-
-            continue
+def draw_grid(surface):
+    width, height = surface.get_size()
+    for x in range(0, width, CELL_SIZE):
+        pygame.draw.line(surface, (40, 40, 40), (x, 0), (x, height))
+    for y in range(0, height, CELL_SIZE):
+        pygame.draw.line(surface, (40, 40, 40), (0, y), (width, y))
+
+class SnakeRenderer:
+    """Keeps the board on its own surface and only repaints the cells that changed.
+
+    The grid is baked once into grid_layer; erasing a cell copies it back from there.
+    """
+
+    def __init__(self, grid_width, grid_height):
+        size = (grid_width * CELL_SIZE, grid_height * CELL_SIZE)
+        self.grid_layer = pygame.Surface(size)
+        self.grid_layer.fill((0, 0, 0))
+        draw_grid(self.grid_layer)
+        self.board = self.grid_layer.copy()
+        self.apple = None
+
+    def cell_rect(self, cell):
+        return pygame.Rect(cell[0] * CELL_SIZE, cell[1] * CELL_SIZE, CELL_SIZE, CELL_SIZE)
+
+    def erase(self, cell):
+        rect = self.cell_rect(cell)
+        self.board.blit(self.grid_layer, rect, rect)
+        return rect
+
+    def fill(self, cell, color):
+        rect = self.cell_rect(cell)
+        pygame.draw.rect(self.board, color, rect)
+        return rect
+
+    def reset(self, state):
+        self.board.blit(self.grid_layer, (0, 0))
+        if state.apple is not None:
+            self.fill(state.apple, (255, 0, 0))
+        for segment in state.body:
+            self.fill(segment, (0, 255, 0))
+        self.apple = state.apple
+
+    def update(self, state):
+        # After one step only the new head, the old tail and the apple can differ
+        dirty = []
+        if state.removed_tail is not None:
+            dirty.append(self.erase(state.removed_tail))
+        if state.apple != self.apple:
+            if state.apple is not None:
+                dirty.append(self.fill(state.apple, (255, 0, 0)))
+            self.apple = state.apple
+        dirty.append(self.fill(state.body[0], (0, 255, 0)))
+        return dirty
+
+class MainMenu(Scene):
+    idle = True
+
+    def __init__(self, screen):
+        super().__init__(screen)
+        self.title_text = render_cache.render_text("Snake", 48, (0, 255, 0))
+        self.start_button = Button((SCREEN_WIDTH//2 - 50, 200, 100, 50), (0, 200, 0), "Start", (255, 255, 255), 24)
+        self.highscore_button = Button((SCREEN_WIDTH//2 - 50, 270, 100, 50), (0, 0, 200), "High Scores", (255, 255, 255), 24)
+
+    def activate(self):
+        pygame.display.set_caption("Snake")
+
+    def handle_event(self, event):
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            pos = to_local(self.screen, event.pos)
+            if self.start_button.is_clicked(pos):
+                self.runtime.push(SnakeGame(self.screen))
+            elif self.highscore_button.is_clicked(pos):
+                self.runtime.push(HighScores(self.screen))
+
+    def draw(self):
+        self.screen.fill((0, 0, 0))
+        self.screen.blit(self.title_text, (SCREEN_WIDTH//2 - self.title_text.get_width()//2, 100))
+        self.start_button.draw(self.screen)
+        self.highscore_button.draw(self.screen)
+
+
+class HighScores(Scene):
+    idle = True
+
+    def handle_event(self, event):
+        if event.type in (pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN):
+            self.runtime.pop(self)
+
+    def draw(self):
+        self.screen.fill((50, 50, 50))
+        hs_text = render_cache.render_text(f"High Score: {high_score}", 36, (255, 255, 255))
+        self.screen.blit(hs_text, (SCREEN_WIDTH // 2 - hs_text.get_width() // 2, SCREEN_HEIGHT // 2))
+
+
+class GameOver(Scene):
+    idle = True
+
+    def __init__(self, screen, score):
+        super().__init__(screen)
+        self.game_over_text = render_cache.render_text("Game Over", 48, (255, 0, 0))
+        self.score_text = render_cache.render_text(f"Score: {score}", 24, (255, 255, 255))
+        self.restart_button = Button((SCREEN_WIDTH // 2 - 50, 250, 100, 50), (0, 200, 0), "Restart", (255, 255, 255), 24)
+        self.menu_button = Button((SCREEN_WIDTH // 2 - 50, 320, 100, 50), (0, 0, 200), "Menu", (255, 255, 255), 24)
+
+    def handle_event(self, event):
+        # Restart and Menu both lead back to the main menu
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            pos = to_local(self.screen, event.pos)
+            if self.restart_button.is_clicked(pos) or self.menu_button.is_clicked(pos):
+                self.runtime.pop(self)
+        elif event.type == pygame.KEYDOWN and event.key in (pygame.K_r, pygame.K_m):
+            self.runtime.pop(self)
+
+    def draw(self):
+        self.screen.fill((0, 0, 0))
+        self.screen.blit(self.game_over_text, (SCREEN_WIDTH // 2 - self.game_over_text.get_width() // 2, 150))
+        self.screen.blit(self.score_text, (SCREEN_WIDTH // 2 - self.score_text.get_width() // 2, 210))
+        self.restart_button.draw(self.screen)
+        self.menu_button.draw(self.screen)
+
+
+class SnakeGame(Scene):
+    def __init__(self, screen):
+        global score
+        super().__init__(screen)
+        score = 0
+        self.state = SnakeState(GRID_WIDTH, GRID_HEIGHT)
+        self.direction = (0, -1)
+        self.move_timer = 0
+        self.renderer = SnakeRenderer(GRID_WIDTH, GRID_HEIGHT)
+        self.renderer.reset(self.state)
+        self.dirty = [self.renderer.board.get_rect()]
+
+    def handle_event(self, event):
+        if event.type == pygame.VIDEOEXPOSE:
+            self.dirty.append(self.renderer.board.get_rect())
+        elif event.type == pygame.KEYDOWN:
+            direction = self.direction
+            if event.key == pygame.K_UP and direction != (0, 1):
+                self.direction = (0, -1)
+            elif event.key == pygame.K_DOWN and direction != (0, -1):
+                self.direction = (0, 1)
+            elif event.key == pygame.K_LEFT and direction != (1, 0):
+                self.direction = (-1, 0)
+            elif event.key == pygame.K_RIGHT and direction != (-1, 0):
+                self.direction = (1, 0)
+
+    def update(self):
+        global score, high_score
+        self.move_timer += 1
+        if self.move_timer < MOVE_TICKS:
+            return
+        self.move_timer = 0
+        if not self.state.step(self.direction):
+            if score > high_score:
+                high_score = score
+            self.runtime.replace(GameOver(self.screen, score))
+            return
+        score = self.state.score
+        self.dirty.extend(self.renderer.update(self.state))
+
+    def invalidate(self, rect):
+        self.dirty.append(rect)
+
+    def draw(self):
+        # Nothing moved, nothing to draw
+        dirty, self.dirty = self.dirty, []
+        for rect in dirty:
+            self.screen.blit(self.renderer.board, rect, rect)
+        return dirty
+
+
+def make_scene(screen):
+    """Scene for the hub, playing on its screen."""
+    return MainMenu(screen)
+
+
+def start_game(profiler=None):
+    pygame.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    # Profiling is opt-in: pass a FrameProfiler or set $GAMES_PROFILE
+    if profiler is None:
+        profiler = FrameProfiler.from_env()
+    Runtime(profiler=profiler).run(make_scene(screen))
+    if profiler is not None:
+        profiler.close()
+    pygame.quit()
 
 
 if __name__ == '__main__':
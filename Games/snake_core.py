@@ -0,0 +1,85 @@
+import random
+from collections import deque
+from typing import Deque, Optional, Tuple
+
+Cell = Tuple[int, int]
+
+
+class SnakeState:
+    """Snake rules from snake.SnakeGame with O(1) moves, collision checks and apple placement.
+
+    The body is a deque (head first), `occupied` marks body cells per grid index and
+    `free` holds every cell not covered by the body, so a new apple is one random pick.
+    """
+
+    def __init__(self, width: int, height: int, rng=random, start: Optional[Cell] = None):
+        self.width = width
+        self.height = height
+        self.rng = rng
+        self.score = 0
+        self.alive = True
+        self.occupied = bytearray(width * height)
+        self.free = list(range(width * height))
+        # Position of each cell inside self.free, -1 while the snake covers it
+        self.free_pos = list(range(width * height))
+        if start is None:
+            start = (width // 2, height // 2)
+        self.body: Deque[Cell] = deque([start])
+        # Tail cell freed by the last step, None when the snake grew
+        self.removed_tail: Optional[Cell] = None
+        self._occupy(start)
+        self.apple = self._random_free_cell()
+
+    def _index(self, cell: Cell) -> int:
+        return cell[1] * self.width + cell[0]
+
+    def _occupy(self, cell: Cell):
+        i = self._index(cell)
+        self.occupied[i] = 1
+        # Swap-remove from the free list
+        pos = self.free_pos[i]
+        last = self.free.pop()
+        if last != i:
+            self.free[pos] = last
+            self.free_pos[last] = pos
+        self.free_pos[i] = -1
+
+    def _release(self, cell: Cell):
+        i = self._index(cell)
+        self.occupied[i] = 0
+        self.free_pos[i] = len(self.free)
+        self.free.append(i)
+
+    def _random_free_cell(self) -> Optional[Cell]:
+        if not self.free:
+            return None
+        i = self.free[self.rng.randrange(len(self.free))]
+        return (i % self.width, i // self.width)
+
+    def is_occupied(self, cell: Cell) -> bool:
+        return bool(self.occupied[self._index(cell)])
+
+    def step(self, direction: Cell) -> bool:
+        """Move one cell; returns False when the snake hit a wall or itself."""
+        if not self.alive:
+            return False
+        head_x, head_y = self.body[0]
+        new_head = (head_x + direction[0], head_y + direction[1])
+
+        # Like SnakeGame, the tail still counts as body at this point
+        if (new_head[0] < 0 or new_head[0] >= self.width or
+                new_head[1] < 0 or new_head[1] >= self.height or
+                self.occupied[self._index(new_head)]):
+            self.alive = False
+            return False
+
+        self.body.appendleft(new_head)
+        self._occupy(new_head)
+        if new_head == self.apple:
+            self.score += 1
+            self.apple = self._random_free_cell()
+            self.removed_tail = None
+        else:
+            self.removed_tail = self.body.pop()
+            self._release(self.removed_tail)
+        return True
@@ -0,0 +1,102 @@
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+# Actions like the arrow keys in snake.SnakeGame
+UP, RIGHT, DOWN, LEFT = 0, 1, 2, 3
+DIRECTIONS = np.array([(0, -1), (1, 0), (0, 1), (-1, 0)], dtype=np.int64)
+
+
+class VecSnakeEnv:
+    """N independent snake games stepped together, without pygame.
+
+    Each board cell holds how many more moves the body stays there (0 = empty),
+    so moving the whole snake is one decrement over the board.
+    Rules follow snake.SnakeGame: walls and the own body (tail included) kill,
+    eating grows the snake by one and the apple jumps to a free cell.
+    Finished games are reset automatically, like a gym vector env.
+    """
+
+    def __init__(self, num_envs: int, width: int = 20, height: int = 20, seed: Optional[int] = None):
+        self.num_envs = num_envs
+        self.width = width
+        self.height = height
+        self.rng = np.random.default_rng(seed)
+        self.boards = np.zeros((num_envs, height, width), dtype=np.int32)
+        self.heads = np.zeros((num_envs, 2), dtype=np.int64)
+        self.directions = np.zeros(num_envs, dtype=np.int64)
+        self.lengths = np.zeros(num_envs, dtype=np.int32)
+        self.apples = np.zeros((num_envs, 2), dtype=np.int64)
+        self.scores = np.zeros(num_envs, dtype=np.int32)
+        self.reset()
+
+    def reset(self, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        if mask is None:
+            mask = np.ones(self.num_envs, dtype=bool)
+        idx = np.flatnonzero(mask)
+        if len(idx):
+            self.boards[idx] = 0
+            self.heads[idx] = (self.width // 2, self.height // 2)
+            self.directions[idx] = UP
+            self.lengths[idx] = 1
+            self.scores[idx] = 0
+            self.boards[idx, self.height // 2, self.width // 2] = 1
+            self._place_apples(idx)
+        return self.observe()
+
+    def _place_apples(self, idx: np.ndarray):
+        # Random free cell per game: random keys, body cells pushed below every free cell
+        keys = self.rng.random((len(idx), self.height * self.width))
+        keys[self.boards[idx].reshape(len(idx), -1) > 0] = -1.0
+        cells = keys.argmax(axis=1)
+        self.apples[idx, 0] = cells % self.width
+        self.apples[idx, 1] = cells // self.width
+
+    def observe(self) -> np.ndarray:
+        """(num_envs, 3, height, width) uint8 planes: body, head, apple."""
+        obs = np.zeros((self.num_envs, 3, self.height, self.width), dtype=np.uint8)
+        obs[:, 0] = self.boards > 0
+        envs = np.arange(self.num_envs)
+        obs[envs, 1, self.heads[:, 1], self.heads[:, 0]] = 1
+        obs[envs, 2, self.apples[:, 1], self.apples[:, 0]] = 1
+        return obs
+
+    def step(self, actions) -> Tuple[np.ndarray, np.ndarray, np.ndarray, Dict[str, np.ndarray]]:
+        actions = np.asarray(actions, dtype=np.int64)
+        envs = np.arange(self.num_envs)
+
+        # Turning straight back is ignored, like the key checks in SnakeGame
+        reverse = (actions + 2) % 4 == self.directions
+        self.directions = np.where(reverse, self.directions, actions)
+        new_heads = self.heads + DIRECTIONS[self.directions]
+        x, y = new_heads[:, 0], new_heads[:, 1]
+
+        outside = (x < 0) | (x >= self.width) | (y < 0) | (y >= self.height)
+        cx = np.clip(x, 0, self.width - 1)
+        cy = np.clip(y, 0, self.height - 1)
+        # The tail has not moved yet, so it still counts as a hit
+        dead = outside | (self.boards[envs, cy, cx] > 0)
+        alive = ~dead
+        ate = alive & (x == self.apples[:, 0]) & (y == self.apples[:, 1])
+
+        # Move: everyone who did not eat loses the last tail cell
+        shrink = alive & ~ate
+        body = self.boards[shrink]
+        body[body > 0] -= 1
+        self.boards[shrink] = body
+        self.lengths[ate] += 1
+        self.scores[ate] += 1
+        self.heads[alive] = new_heads[alive]
+        live = np.flatnonzero(alive)
+        self.boards[live, y[live], x[live]] = self.lengths[live]
+
+        full = ate & (self.lengths >= self.width * self.height)
+        if ate.any():
+            self._place_apples(np.flatnonzero(ate & ~full))
+
+        rewards = ate.astype(np.float32) - dead.astype(np.float32)
+        dones = dead | full
+        info = {'scores': self.scores.copy(), 'lengths': self.lengths.copy()}
+        if dones.any():
+            self.reset(dones)
+        return self.observe(), rewards, dones, info
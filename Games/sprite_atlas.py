@@ -0,0 +1,143 @@
+from typing import Dict, Iterable, List, Tuple
+
+import pygame
+
+import render_cache
+
+Color = Tuple[int, int, int]
+Blit = Tuple[pygame.Surface, Tuple[int, int], pygame.Rect]
+
+ATLAS_WIDTH = 1024
+PREBUILT_LEVELS = 10
+HEALTH_BAR_WIDTH = 40
+HEALTH_BAR_HEIGHT = 5
+HEALTH_BAR_BACK = (50, 50, 50)
+HEALTH_BAR_FILL = (0, 255, 0)
+TOWER_BASE = (50, 50, 50)
+PROJECTILE_RADIUS = 4
+# Transparent atlas pixels; colorkey blits are much cheaper than per-pixel alpha
+COLORKEY = (255, 0, 255)
+
+
+def circle_sprite(color: Color, radius: int) -> pygame.Surface:
+    # Same pixels as pygame.draw.circle at the sprite's center
+    sprite = pygame.Surface((radius * 2 + 1, radius * 2 + 1), pygame.SRCALPHA)
+    pygame.draw.circle(sprite, color, (radius, radius), radius)
+    return sprite
+
+
+def tower_sprite(color: Color, size: int, level: int) -> pygame.Surface:
+    # Base, body and level number of a tower, centered on (size + 2, size + 2)
+    sprite = circle_sprite(TOWER_BASE, size + 2)
+    center = (size + 2, size + 2)
+    pygame.draw.circle(sprite, color, center, size)
+    level_text = render_cache.render_text(str(level), 20, (255, 255, 255))
+    sprite.blit(level_text, level_text.get_rect(center=center))
+    return sprite
+
+
+class SpriteAtlas:
+    """Tower, enemy, health bar and projectile visuals packed into one texture.
+
+    Sprites are rendered once and shelf-packed onto a colorkeyed surface; their
+    pixels are either opaque or fully transparent, so the colorkey gives the same
+    result as alpha blending at a fraction of the cost. Drawing then means collecting
+    (atlas, position, area) triples and handing them to one Surface.blits call.
+    Towers above PREBUILT_LEVELS get their own surface on first use. Range circles
+    stay in render_cache: they are too large to pack and only drawn with the towers.
+    """
+
+    def __init__(self, tower_types: Dict[str, dict], enemy_types: Dict[str, dict],
+                 levels: int = PREBUILT_LEVELS):
+        sprites: Dict[tuple, pygame.Surface] = {}
+        for data in tower_types.values():
+            for level in range(1, levels + 1):
+                size = data['size'] + 2 * (level - 1)
+                sprites[('tower', data['color'], size, level)] = tower_sprite(data['color'], size, level)
+            sprites[('shot', data['color'])] = circle_sprite(data['color'], PROJECTILE_RADIUS)
+        for data in enemy_types.values():
+            sprites[('enemy', data['color'], data['size'])] = circle_sprite(data['color'], data['size'])
+        for key, color in (('bar_back', HEALTH_BAR_BACK), ('bar_fill', HEALTH_BAR_FILL)):
+            bar = pygame.Surface((HEALTH_BAR_WIDTH, HEALTH_BAR_HEIGHT), pygame.SRCALPHA)
+            bar.fill(color)
+            sprites[(key,)] = bar
+        self.surface, self.areas = self.pack(sprites)
+        # Sprites that did not make it into the atlas: key -> (surface, area)
+        self.extra: Dict[tuple, Tuple[pygame.Surface, pygame.Rect]] = {}
+
+    @staticmethod
+    def pack(sprites: Dict[tuple, pygame.Surface]) -> Tuple[pygame.Surface, Dict[tuple, pygame.Rect]]:
+        # Shelf packing: tallest first, left to right, a new shelf when the row is full
+        order = sorted(sprites, key=lambda key: -sprites[key].get_height())
+        areas = {}
+        x = y = shelf = 0
+        for key in order:
+            width, height = sprites[key].get_size()
+            if x + width > ATLAS_WIDTH:
+                x, y, shelf = 0, y + shelf, 0
+            areas[key] = pygame.Rect(x, y, width, height)
+            x += width
+            shelf = max(shelf, height)
+        surface = pygame.Surface((ATLAS_WIDTH, max(y + shelf, 1)))
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert()
+        surface.fill(COLORKEY)
+        for key, area in areas.items():
+            surface.blit(sprites[key], area)
+        surface.set_colorkey(COLORKEY)
+        return surface, areas
+
+    def lookup(self, key: tuple, build) -> Tuple[pygame.Surface, pygame.Rect]:
+        area = self.areas.get(key)
+        if area is not None:
+            return self.surface, area
+        found = self.extra.get(key)
+        if found is None:
+            sprite = build()
+            found = self.extra[key] = (sprite, sprite.get_rect())
+        return found
+
+    def add_towers(self, batch: List[Blit], towers: Iterable):
+        """Queue base, body, level and range circle of every tower."""
+        for tower in towers:
+            key = ('tower', tower.color, tower.size, tower.level)
+            source, area = self.lookup(key, lambda: tower_sprite(tower.color, tower.size, tower.level))
+            offset = tower.size + 2
+            batch.append((source, (tower.x - offset, tower.y - offset), area))
+            range_surface = render_cache.range_circle(tower.range)
+            batch.append((range_surface, (tower.x - int(tower.range), tower.y - int(tower.range)),
+                          range_surface.get_rect()))
+
+    def add_enemies(self, batch: List[Blit], enemies: Iterable):
+        """Queue body and health bar of every enemy."""
+        atlas = self.surface
+        areas = self.areas
+        back = areas[('bar_back',)]
+        fill = areas[('bar_fill',)]
+        append = batch.append
+        for enemy in enemies:
+            x = int(enemy.x)
+            y = int(enemy.y)
+            size = enemy.size
+            key = ('enemy', enemy.color, size)
+            if key in areas:
+                append((atlas, (x - size, y - size), areas[key]))
+            else:
+                color = enemy.color
+                source, area = self.lookup(key, lambda: circle_sprite(color, size))
+                append((source, (x - size, y - size), area))
+            bar_x = x - HEALTH_BAR_WIDTH // 2
+            bar_y = y - size - 10
+            append((atlas, (bar_x, bar_y), back))
+            # pygame.Rect truncates the float width like pygame.draw.rect did
+            width = int(HEALTH_BAR_WIDTH * (enemy.health / enemy.max_health))
+            if width > 0:
+                append((atlas, (bar_x, bar_y), pygame.Rect(fill.x, fill.y, width, fill.height)))
+
+    def add_projectiles(self, batch: List[Blit], projectiles: Iterable):
+        for projectile in projectiles:
+            key = ('shot', projectile.color)
+            color = projectile.color
+            source, area = self.lookup(key, lambda: circle_sprite(color, PROJECTILE_RADIUS))
+            batch.append((source, (int(projectile.x) - PROJECTILE_RADIUS, int(projectile.y) - PROJECTILE_RADIUS),
+                          area))
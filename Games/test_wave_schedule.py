@@ -0,0 +1,56 @@
+import tower_defense
+from tower_defense import Game
+
+LAYOUT = [(250, 250, 'Basic'), (350, 200, 'Sniper'), (450, 450, 'Splash'), (550, 350, 'Basic')]
+
+
+def record_waves(scheduled: bool, ticks: int, seed: int):
+    # Spawn ticks per wave and the tick every wave started, stepping one update at a time
+    game = Game(headless=True, seed=seed, scheduled=scheduled)
+    game.money = 10 ** 6
+    for x, y, tower_type in LAYOUT:
+        game.place_tower(x, y, tower_type)
+    spawns = {}
+    starts = []
+    add_enemy = game.add_enemy
+
+    def counting_add_enemy(enemy_type):
+        spawns.setdefault(game.wave, []).append((tick, enemy_type))
+        add_enemy(enemy_type)
+    game.add_enemy = counting_add_enemy
+
+    running = False
+    for tick in range(ticks):
+        game.update()
+        if game.wave_in_progress and not running:
+            starts.append(tick)
+        running = game.wave_in_progress
+    return spawns, starts, (game.money, game.lives, game.wave)
+
+
+def test_scheduler_matches_classic_waves():
+    for seed in range(3):
+        classic = record_waves(False, 12000, seed)
+        scheduled = record_waves(True, 12000, seed)
+        assert scheduled == classic
+        spawns, starts, _ = classic
+        assert starts[:2] == [300, 1802]
+        # About one spawn per second over the 20 s of a wave, not wave * 5 in total
+        assert len(spawns[1]) >= 20 and len(spawns[2]) >= 20
+
+
+def test_idle_skipping_keeps_results():
+    for seed in range(3):
+        classic = tower_defense.simulate(20000, LAYOUT, seed)
+        scheduled = tower_defense.simulate(20000, LAYOUT, seed, scheduled=True)
+        assert scheduled == classic
+
+
+def test_max_speed_skips_idle_ticks():
+    game = Game(headless=True, seed=0, scheduled=True)
+    game.speed = None
+    game.update()
+    assert game.scheduler.now == tower_defense.GAME_START_DELAY
+    assert game.wave_countdown == 0 and not game.game_started
+    game.update()
+    assert game.game_started
@@ -1,5 +1,10 @@
 import pygame
 import random
+import sys
+import render_cache
+from frame_profiler import FrameProfiler
+from game_registry import to_local
+from scene_runtime import Runtime, Scene, TICK_RATE
 
 ROWS = 20
 COLS = 10
@@ -22,9 +27,17 @@ TETROMINOS = {
           [1, 1, 1]]
 }
 
+# Alle vier Drehungen jedes Steins, einmal vorberechnet statt bei jedem K_UP
+ROTATIONS = {}
+for _name, _shape in TETROMINOS.items():
+    ROTATIONS[_name] = [_shape]
+    for _ in range(3):
+        ROTATIONS[_name].append([list(row) for row in zip(*ROTATIONS[_name][-1][::-1])])
+
 CELL_SIZE = 30
 BOARD_OFFSET_X = (400 - COLS * CELL_SIZE) // 2
 BOARD_OFFSET_Y = 0
+DROP_TICKS = TICK_RATE * 500 // 1000  # Schwerkraft alle 500 ms
 
 def create_board():
     return [[0 for _ in range(COLS)] for _ in range(ROWS)]
@@ -60,6 +73,15 @@ def draw_tetromino(screen, tetromino):
                 pygame.draw.rect(screen, (255, 0, 0),
                                  (BOARD_OFFSET_X + (tetromino.x + x) * CELL_SIZE, BOARD_OFFSET_Y + (tetromino.y + y) * CELL_SIZE, CELL_SIZE, CELL_SIZE))
 
+def draw_hint(screen, tetromino_type, move):
+    # Umriss der Platzierung, die der Bot vorschlägt
+    shape = ROTATIONS[tetromino_type][move.rotation]
+    for y, row in enumerate(shape):
+        for x, cell in enumerate(row):
+            if cell:
+                pygame.draw.rect(screen, (0, 255, 0),
+                                 (BOARD_OFFSET_X + (move.x + x) * CELL_SIZE, BOARD_OFFSET_Y + (move.y + y) * CELL_SIZE, CELL_SIZE, CELL_SIZE), 2)
+
 def add_to_board(board, shape, offset_x, offset_y):
     for y, row in enumerate(shape):
         for x, cell in enumerate(row):
@@ -74,57 +96,41 @@ def clear_lines(board):
     return new_board, lines_cleared
 
 
-def game_over_screen(score, screen):
-    # Erstelle einen kleineren Font für die Anzeige
-    game_over_font = pygame.font.Font(None, 36)
-    info_font = pygame.font.Font(None, 24)
-    game_over_text = game_over_font.render("Game Over", True, (255, 0, 0))
-    score_text = info_font.render(f"Score: {high_score}", True, (255, 255, 255))
-    restart_text = info_font.render("Drücke R für Restart oder Q für Quit", True, (255, 255, 255))
-
-    # Endlosschleife für den Game Over Bildschirm
-    while True:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                exit()
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_r:
-                    return True
-                elif event.key == pygame.K_q:
-                    return False  # Quit
-
-        screen.fill((0, 0, 0))
-
-        screen.blit(game_over_text, (screen.get_width() // 2 - game_over_text.get_width() // 2, 150))
-        screen.blit(score_text, (screen.get_width() // 2 - score_text.get_width() // 2, 200))
-        screen.blit(restart_text, (screen.get_width() // 2 - restart_text.get_width() // 2, 250))
-        pygame.display.flip()
+def board_backend(bitboard=False):
+    # Beide Backends bieten create_board, is_valid_position, add_to_board, clear_lines und draw_board
+    if bitboard:
+        import tetris_bitboard
+        return tetris_bitboard
+    return sys.modules[__name__]
 
 
 class Tetromino:
     def __init__(self, tetromino_type):
         self.type = tetromino_type
         self.rotation = 0
-        self.shape = TETROMINOS[tetromino_type]
+        self.shape = ROTATIONS[tetromino_type][0]
         self.x = COLS // 2 - len(self.shape[0]) // 2
         self.y = 0
 
     def get_current_shape(self):
         return self.shape
 
+    def next_rotation(self):
+        rotation = (self.rotation + 1) % len(ROTATIONS[self.type])
+        return rotation, ROTATIONS[self.type][rotation]
+
 
 class Button:
-    def __init__(self, rect, color, text, text_color, font):
+    def __init__(self, rect, color, text, text_color, font_size):
         self.rect = pygame.Rect(rect)
         self.color = color
         self.text = text
         self.text_color = text_color
-        self.font = font
+        self.font_size = font_size
 
     def draw(self, surface):
         pygame.draw.rect(surface, self.color, self.rect)
-        text_surface = self.font.render(self.text, True, self.text_color)
+        text_surface = render_cache.render_text(self.text, self.font_size, self.text_color)
         text_rect = text_surface.get_rect(center=self.rect.center)
         surface.blit(text_surface, text_rect)
 
@@ -132,121 +138,180 @@ class Button:
         return self.rect.collidepoint(pos)
 
 
-def show_high_scores(screen, font):
-    high_scores_active = True
-    while high_scores_active:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                exit()
-            elif event.type == pygame.KEYDOWN or event.type == pygame.MOUSEBUTTONDOWN:
-                high_scores_active = False
-
-        screen.fill((50, 50, 50))
-        score_text = font.render(f"High Scores: {score}", True, (255, 255, 255))
-        screen.blit(score_text, (100, 250))
-        pygame.display.flip()
-
-
-def main_menu(screen):
-    font = pygame.font.Font(None, 36)
-    start_button = Button((150, 200, 100, 50), (0, 200, 0), "Start", (255, 255, 255), font)
-    highscore_button = Button((150, 300, 100, 50), (0, 0, 200), "High Scores", (255, 255, 255), font)
-
-    menu_active = True
-    while menu_active:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                exit()
-            elif event.type == pygame.MOUSEBUTTONDOWN:
-                if start_button.is_clicked(event.pos):
-                    menu_active = False
-                elif highscore_button.is_clicked(event.pos):
-                    show_high_scores(screen, font)
-
+class HighScores(Scene):
+    idle = True
+
+    def handle_event(self, event):
+        if event.type == pygame.KEYDOWN or event.type == pygame.MOUSEBUTTONDOWN:
+            self.runtime.pop(self)
+
+    def draw(self):
+        self.screen.fill((50, 50, 50))
+        score_text = render_cache.render_text(f"High Scores: {score}", 36, (255, 255, 255))
+        self.screen.blit(score_text, (100, 250))
+
+
+class MainMenu(Scene):
+    idle = True
+
+    def __init__(self, screen, bitboard=False):
+        super().__init__(screen)
+        self.bitboard = bitboard
+        self.start_button = Button((150, 200, 100, 50), (0, 200, 0), "Start", (255, 255, 255), 36)
+        self.highscore_button = Button((150, 300, 100, 50), (0, 0, 200), "High Scores", (255, 255, 255), 36)
+
+    def activate(self):
+        pygame.display.set_caption("Tetris")
+
+    def handle_event(self, event):
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            pos = to_local(self.screen, event.pos)
+            if self.start_button.is_clicked(pos):
+                self.runtime.push(TetrisGame(self.screen, self, self.bitboard))
+            elif self.highscore_button.is_clicked(pos):
+                self.runtime.push(HighScores(self.screen))
+
+    def draw(self):
+        self.screen.fill((0, 0, 0))
+        self.start_button.draw(self.screen)
+        self.highscore_button.draw(self.screen)
+
+
+class GameOver(Scene):
+    idle = True
+
+    def __init__(self, screen, menu, game):
+        super().__init__(screen)
+        self.menu = menu
+        self.game = game
+        # Erstelle einen kleineren Font für die Anzeige
+        self.game_over_text = render_cache.render_text("Game Over", 36, (255, 0, 0))
+        self.score_text = render_cache.render_text(f"Score: {high_score}", 24, (255, 255, 255))
+        self.restart_text = render_cache.render_text("Drücke R für Restart oder Q für Quit", 24, (255, 255, 255))
+
+    def handle_event(self, event):
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_r:
+                # Neues Spiel über das Hauptmenü
+                self.runtime.pop(self.game)
+            elif event.key == pygame.K_q:
+                # Tetris verlassen: zurück zum Hub oder Programmende
+                self.runtime.pop(self.menu)
+
+    def draw(self):
+        screen = self.screen
         screen.fill((0, 0, 0))
-        start_button.draw(screen)
-        highscore_button.draw(screen)
-        pygame.display.flip()
 
-def start_game():
-    global score, high_score
-    score = 0
-    pygame.init()
-    screen = pygame.display.set_mode((400, 600))
-    pygame.display.set_caption("Tetris")
-    clock = pygame.time.Clock()
-
-
-    main_menu(screen)
-
-
-    board = create_board()
-    font = pygame.font.Font(None, 48)
-
-    active_tetromino = Tetromino(random.choice(list(TETROMINOS.keys())))
-
-    DROP_EVENT = pygame.USEREVENT + 1
-    drop_delay = 500
-    pygame.time.set_timer(DROP_EVENT, drop_delay)
-
-    running = True
-    while running:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-            elif event.type == DROP_EVENT:
-                new_y = active_tetromino.y + 1
-                if is_valid_position(board, active_tetromino.get_current_shape(), active_tetromino.x, new_y):
-                    active_tetromino.y = new_y
-                else:
-                    add_to_board(board, active_tetromino.get_current_shape(), active_tetromino.x, active_tetromino.y)
-                    board, lines_cleared = clear_lines(board)
-                    score += lines_cleared * 100
-                    new_tetromino = Tetromino(random.choice(list(TETROMINOS.keys())))
-                    if not is_valid_position(board, new_tetromino.get_current_shape(), new_tetromino.x, new_tetromino.y):
-                        print("Game Over! Score:", score)
-                        if score > high_score:
-                            high_score = score
-                        restart = game_over_screen(score, screen)
-                        if restart:
-                            main_menu(screen)
-                            board = create_board()
-                        else:
-                            running = False
-                    else:
-                        active_tetromino = new_tetromino
-
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_LEFT:
-                    new_x = active_tetromino.x - 1
-                    if is_valid_position(board, active_tetromino.get_current_shape(), new_x, active_tetromino.y):
-                        active_tetromino.x = new_x
-                elif event.key == pygame.K_RIGHT:
-                    new_x = active_tetromino.x + 1
-                    if is_valid_position(board, active_tetromino.get_current_shape(), new_x, active_tetromino.y):
-                        active_tetromino.x = new_x
-                elif event.key == pygame.K_DOWN:
-                    new_y = active_tetromino.y + 1
-                    if is_valid_position(board, active_tetromino.get_current_shape(), active_tetromino.x, new_y):
-                        active_tetromino.y = new_y
-                elif event.key == pygame.K_UP:
-                    # Rotation: Hier erzeugen wir eine gedrehte Version der aktuellen Form.
-                    rotated_shape = [list(row) for row in zip(*active_tetromino.get_current_shape()[::-1])]
-                    if is_valid_position(board, rotated_shape, active_tetromino.x, active_tetromino.y):
-                        active_tetromino.shape = rotated_shape
+        screen.blit(self.game_over_text, (screen.get_width() // 2 - self.game_over_text.get_width() // 2, 150))
+        screen.blit(self.score_text, (screen.get_width() // 2 - self.score_text.get_width() // 2, 200))
+        screen.blit(self.restart_text, (screen.get_width() // 2 - self.restart_text.get_width() // 2, 250))
+
+
+class TetrisGame(Scene):
+    overlay_pos = (5, 70)
+
+    def __init__(self, screen, menu, bitboard=False):
+        super().__init__(screen)
+        self.menu = menu
+        self.bitboard = bitboard
+        self.board_ops = board_backend(bitboard)
+        self.board = self.board_ops.create_board()
+        self.active_tetromino = Tetromino(random.choice(list(TETROMINOS.keys())))
+        self.drop_timer = 0
+
+        # Tipp-Anzeige mit H; wird nur einmal pro Stein berechnet
+        self.show_hint = False
+        self.bot = None
+        self.hint = None
+        self.hint_for = None
+
+    def fits(self, shape, x, y):
+        return self.board_ops.is_valid_position(self.board, shape, x, y)
+
+    def handle_event(self, event):
+        piece = self.active_tetromino
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_LEFT:
+                if self.fits(piece.get_current_shape(), piece.x - 1, piece.y):
+                    piece.x -= 1
+            elif event.key == pygame.K_RIGHT:
+                if self.fits(piece.get_current_shape(), piece.x + 1, piece.y):
+                    piece.x += 1
+            elif event.key == pygame.K_DOWN:
+                if self.fits(piece.get_current_shape(), piece.x, piece.y + 1):
+                    piece.y += 1
+            elif event.key == pygame.K_h:
+                self.show_hint = not self.show_hint
+            elif event.key == pygame.K_UP:
+                # Rotation: Die gedrehten Formen sind in ROTATIONS vorberechnet.
+                rotation, rotated_shape = piece.next_rotation()
+                if self.fits(rotated_shape, piece.x, piece.y):
+                    piece.shape = rotated_shape
+                    piece.rotation = rotation
+
+    def update(self):
+        global score, high_score
+        # Schwerkraft: alle DROP_TICKS Updates eine Reihe tiefer
+        self.drop_timer += 1
+        if self.drop_timer < DROP_TICKS:
+            return
+        self.drop_timer = 0
+        piece = self.active_tetromino
+        if self.fits(piece.get_current_shape(), piece.x, piece.y + 1):
+            piece.y += 1
+            return
+        self.board_ops.add_to_board(self.board, piece.get_current_shape(), piece.x, piece.y)
+        self.board, lines_cleared = self.board_ops.clear_lines(self.board)
+        score += lines_cleared * 100
+        new_tetromino = Tetromino(random.choice(list(TETROMINOS.keys())))
+        if not self.fits(new_tetromino.get_current_shape(), new_tetromino.x, new_tetromino.y):
+            print("Game Over! Score:", score)
+            if score > high_score:
+                high_score = score
+            self.runtime.push(GameOver(self.screen, self.menu, self))
+        else:
+            self.active_tetromino = new_tetromino
+
+    def draw(self):
+        screen = self.screen
+        screen.fill((0, 0, 0))
+        self.board_ops.draw_board(screen, self.board)
+        if self.show_hint:
+            if self.hint_for is not self.active_tetromino:
+                profiler = self.runtime.profiler
+                if profiler is not None:
+                    profiler.mark('draw')
+                if self.bot is None:
+                    from tetris_bot import TetrisBot
+                    self.bot = TetrisBot()
+                bits = self.board if self.bitboard else board_backend(True).from_rows(self.board)
+                self.hint = self.bot.best_move(bits, self.active_tetromino.type)
+                self.hint_for = self.active_tetromino
+                if profiler is not None:
+                    profiler.mark('hint')
+            if self.hint is not None:
+                draw_hint(screen, self.active_tetromino.type, self.hint)
+        draw_tetromino(screen, self.active_tetromino)
+        score_surface = render_cache.render_text(f"{score}", 48, (255, 255, 255))
+        screen.blit(score_surface, (10, 10))
 
 
+def make_scene(screen, bitboard=False):
+    """Scene für den Hub, gespielt in dessen Fenster."""
+    global score
+    score = 0
+    return MainMenu(screen, bitboard)
 
-        screen.fill((0, 0, 0))
-        draw_board(screen, board)
-        draw_tetromino(screen, active_tetromino)
-        score_surface = font.render(f"{score}", True, (255, 255, 255))
-        screen.blit(score_surface, (10, 10))
-        pygame.display.flip()
-        clock.tick(60)
 
+def start_game(bitboard=False, profiler=None):
+    pygame.init()
+    screen = pygame.display.set_mode((400, 600))
+    # Profiling ist optional: FrameProfiler übergeben oder $GAMES_PROFILE setzen
+    if profiler is None:
+        profiler = FrameProfiler.from_env()
+    Runtime(profiler=profiler).run(make_scene(screen, bitboard))
+    if profiler is not None:
+        profiler.close()
     pygame.quit()
 
 if __name__ == '__main__':
@@ -0,0 +1,82 @@
+import pygame
+
+from tetris import BOARD_OFFSET_X, BOARD_OFFSET_Y, CELL_SIZE, COLS, ROTATIONS, ROWS
+
+# Board as one int per row, bit x set when column x is filled.
+# Same functions as the list board in tetris.py, so start_game can use either.
+FULL_ROW = (1 << COLS) - 1
+
+
+def shape_masks(shape):
+    # (row masks as (dy, mask), leftmost filled x, rightmost filled x)
+    rows = []
+    xs = []
+    for y, row in enumerate(shape):
+        mask = 0
+        for x, cell in enumerate(row):
+            if cell:
+                mask |= 1 << x
+                xs.append(x)
+        if mask:
+            rows.append((y, mask))
+    return tuple(rows), min(xs), max(xs)
+
+
+# Masks for every precomputed rotation, looked up by the identity of the shape list
+SHAPE_MASKS = {id(shape): shape_masks(shape) for shapes in ROTATIONS.values() for shape in shapes}
+
+
+def masks_for(shape):
+    masks = SHAPE_MASKS.get(id(shape))
+    if masks is None:
+        masks = shape_masks(shape)
+    return masks
+
+
+def create_board():
+    return [0] * ROWS
+
+
+def is_valid_position(board, shape, offset_x, offset_y):
+    rows, min_x, max_x = masks_for(shape)
+    if offset_x + min_x < 0 or offset_x + max_x >= COLS:
+        return False
+    for y, mask in rows:
+        board_y = offset_y + y
+        if board_y >= ROWS:
+            return False
+        if board_y >= 0:
+            shifted = mask << offset_x if offset_x >= 0 else mask >> -offset_x
+            if board[board_y] & shifted:
+                return False
+    return True
+
+
+def add_to_board(board, shape, offset_x, offset_y):
+    rows, _, _ = masks_for(shape)
+    for y, mask in rows:
+        board_y = offset_y + y
+        if board_y >= 0:
+            board[board_y] |= mask << offset_x if offset_x >= 0 else mask >> -offset_x
+
+
+def clear_lines(board):
+    new_board = [row for row in board if row != FULL_ROW]
+    lines_cleared = ROWS - len(new_board)
+    return [0] * lines_cleared + new_board, lines_cleared
+
+
+def from_rows(board):
+    # List board from tetris.py -> bitboard
+    return [sum(1 << x for x, cell in enumerate(row) if cell) for row in board]
+
+
+def draw_board(screen, board):
+    for y, row in enumerate(board):
+        for x in range(COLS):
+            if row >> x & 1:
+                pygame.draw.rect(screen, (200, 200, 200),
+                                 (BOARD_OFFSET_X + x * CELL_SIZE, BOARD_OFFSET_Y + y * CELL_SIZE, CELL_SIZE, CELL_SIZE))
+            else:
+                pygame.draw.rect(screen, (50, 50, 50),
+                                 (BOARD_OFFSET_X + x * CELL_SIZE, BOARD_OFFSET_Y + y * CELL_SIZE, CELL_SIZE, CELL_SIZE), 1)
@@ -0,0 +1,207 @@
+import random
+import struct
+from typing import Iterator, List, Tuple
+
+from tetris import COLS, DROP_TICKS, ROTATIONS, TETROMINOS
+from tetris_bitboard import add_to_board, clear_lines, create_board, is_valid_position
+
+# Inputs of one tick as bit flags, like the keys handled in tetris.start_game
+LEFT = 1
+RIGHT = 2
+DOWN = 4
+ROTATE = 8
+
+TICKS_PER_SECOND = 60
+
+REPLAY_MAGIC = b'TRP1'
+REPLAY_HEADER = struct.Struct('<4sQHIQ')  # magic, seed, drop ticks, final score, ticks
+
+
+def seven_bag(seed: int) -> Iterator[str]:
+    """Reproducible pieces: every 7 pieces are a shuffled set of all tetrominos."""
+    rng = random.Random(seed)
+    names = list(TETROMINOS.keys())
+    while True:
+        bag = names[:]
+        rng.shuffle(bag)
+        yield from bag
+
+
+class TetrisSim:
+    """Tetris rules from start_game without timers, events or a display.
+
+    Every call to step() is one tick; gravity moves the piece every drop_ticks ticks.
+    """
+
+    def __init__(self, seed: int, drop_ticks: int = DROP_TICKS, record: bool = True):
+        self.seed = seed
+        self.drop_ticks = drop_ticks
+        self.pieces = seven_bag(seed)
+        self.board = create_board()
+        self.score = 0
+        self.lines = 0
+        self.ticks = 0
+        self.game_over = False
+        self.replay = ReplayWriter(seed, drop_ticks) if record else None
+        self.piece_count = 0
+        self.spawn(next(self.pieces))
+
+    def spawn(self, piece_type: str):
+        self.piece_count += 1
+        self.piece = piece_type
+        self.rotation = 0
+        self.x = COLS // 2 - len(ROTATIONS[piece_type][0][0]) // 2
+        self.y = 0
+
+    @property
+    def shape(self):
+        return ROTATIONS[self.piece][self.rotation]
+
+    def step(self, inputs: int = 0):
+        if self.game_over:
+            return
+        if self.replay is not None:
+            self.replay.add(inputs)
+        if inputs:
+            self.apply_inputs(inputs)
+        self.ticks += 1
+        if self.ticks % self.drop_ticks == 0:
+            self.gravity()
+
+    def run_idle(self, ticks: int):
+        # Ticks without input only matter when gravity kicks in, so jump between drops
+        if self.game_over or ticks <= 0:
+            return
+        if self.replay is not None:
+            self.replay.add(0, ticks)
+        end = self.ticks + ticks
+        next_drop = (self.ticks // self.drop_ticks + 1) * self.drop_ticks
+        while next_drop <= end and not self.game_over:
+            self.ticks = next_drop
+            self.gravity()
+            next_drop += self.drop_ticks
+        if not self.game_over:
+            self.ticks = end
+
+    def apply_inputs(self, inputs: int):
+        if inputs & LEFT and is_valid_position(self.board, self.shape, self.x - 1, self.y):
+            self.x -= 1
+        if inputs & RIGHT and is_valid_position(self.board, self.shape, self.x + 1, self.y):
+            self.x += 1
+        if inputs & DOWN and is_valid_position(self.board, self.shape, self.x, self.y + 1):
+            self.y += 1
+        if inputs & ROTATE:
+            rotation = (self.rotation + 1) % len(ROTATIONS[self.piece])
+            if is_valid_position(self.board, ROTATIONS[self.piece][rotation], self.x, self.y):
+                self.rotation = rotation
+
+    def gravity(self):
+        if is_valid_position(self.board, self.shape, self.x, self.y + 1):
+            self.y += 1
+            return
+        add_to_board(self.board, self.shape, self.x, self.y)
+        self.board, lines_cleared = clear_lines(self.board)
+        self.lines += lines_cleared
+        self.score += lines_cleared * 100
+        self.spawn(next(self.pieces))
+        if not is_valid_position(self.board, self.shape, self.x, self.y):
+            self.game_over = True
+
+
+class ReplayWriter:
+    """Collects the input stream as (inputs, run length) pairs."""
+
+    def __init__(self, seed: int, drop_ticks: int):
+        self.seed = seed
+        self.drop_ticks = drop_ticks
+        self.runs: List[List[int]] = []
+
+    def add(self, inputs: int, count: int = 1):
+        if self.runs and self.runs[-1][0] == inputs:
+            self.runs[-1][1] += count
+        else:
+            self.runs.append([inputs, count])
+
+    def to_bytes(self, score: int, ticks: int) -> bytes:
+        out = bytearray(REPLAY_HEADER.pack(REPLAY_MAGIC, self.seed, self.drop_ticks, score, ticks))
+        for inputs, count in self.runs:
+            out.append(inputs)
+            # Run length as a varint, most runs fit into one byte
+            while count >= 0x80:
+                out.append(count & 0x7F | 0x80)
+                count >>= 7
+            out.append(count)
+        return bytes(out)
+
+
+def save_replay(sim: TetrisSim) -> bytes:
+    return sim.replay.to_bytes(sim.score, sim.ticks)
+
+
+def read_replay(data: bytes) -> Tuple[int, int, int, int, List[Tuple[int, int]]]:
+    """Returns (seed, drop ticks, score, ticks, [(inputs, run length), ...])."""
+    magic, seed, drop_ticks, score, ticks = REPLAY_HEADER.unpack_from(data)
+    if magic != REPLAY_MAGIC:
+        raise ValueError("not a tetris replay")
+    runs = []
+    pos = REPLAY_HEADER.size
+    while pos < len(data):
+        inputs = data[pos]
+        pos += 1
+        count = 0
+        shift = 0
+        while True:
+            byte = data[pos]
+            pos += 1
+            count |= (byte & 0x7F) << shift
+            shift += 7
+            if byte < 0x80:
+                break
+        runs.append((inputs, count))
+    return seed, drop_ticks, score, ticks, runs
+
+
+def play_replay(data: bytes) -> TetrisSim:
+    seed, drop_ticks, _, _, runs = read_replay(data)
+    sim = TetrisSim(seed, drop_ticks, record=False)
+    for inputs, count in runs:
+        if inputs:
+            for _ in range(count):
+                sim.step(inputs)
+        else:
+            sim.run_idle(count)
+    return sim
+
+
+def verify_replay(data: bytes) -> bool:
+    _, _, score, ticks, _ = read_replay(data)
+    sim = play_replay(data)
+    return sim.score == score and sim.ticks == ticks
+
+
+def self_play(seed: int, max_pieces: int = 1000, bot=None) -> TetrisSim:
+    """Let the placement bot play a headless game, recording a replay on the way."""
+    if bot is None:
+        from tetris_bot import TetrisBot
+        bot = TetrisBot()
+    sim = TetrisSim(seed)
+    for _ in range(max_pieces):
+        if sim.game_over:
+            break
+        move = bot.best_move(sim.board, sim.piece)
+        if move is None:
+            break
+        piece = sim.piece_count
+        # Rotate and shift like a player would, then soft drop and let gravity lock it
+        for _ in range(move.rotation):
+            sim.step(ROTATE)
+        while sim.x != move.x and sim.piece_count == piece:
+            before = sim.x
+            sim.step(LEFT if move.x < sim.x else RIGHT)
+            if sim.x == before:
+                break
+        while sim.y < move.y and sim.piece_count == piece:
+            sim.step(DOWN)
+        while sim.piece_count == piece and not sim.game_over:
+            sim.run_idle(sim.drop_ticks - sim.ticks % sim.drop_ticks)
+    return sim
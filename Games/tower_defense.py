@@ -1,10 +1,20 @@
 import pygame
+import argparse
 import math
+import os
 import random
-from typing import List, Tuple
-
-# Initialize Pygame
-pygame.init()
+import itertools
+import time
+import render_cache
+from flow_field import FlowField, Tile, path_tiles
+from frame_profiler import FrameProfiler
+from game_registry import to_local
+from projectiles import ProjectileSystem
+from scene_runtime import Runtime, Scene, TICK_RATE
+from sim_thread import SimulationThread
+from sprite_atlas import SpriteAtlas
+from wave_schedule import WaveScheduler
+from typing import Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
 
 # Window and Game Settings
 WINDOW_WIDTH = 800
@@ -13,6 +23,20 @@ TILE_SIZE = 40
 WAVE_DURATION = 1200  # 20 seconds per wave
 WAVE_DELAY = 300     # 5 seconds between waves
 GAME_START_DELAY = 300  # 5 seconds before first wave
+DIRTY_RECT_LIMIT = 150  # above this many dirty rects a full redraw is cheaper
+PROFILER_POS = (10, 140)  # profiler overlay, below money/lives/wave/speed
+# Options of the playable game; $GAMES_TD changes them without code, e.g. GAMES_TD=dirty_rects
+OPTIONS_ENV = 'GAMES_TD'
+DEFAULT_OPTIONS = {'dirty_rects': False, 'flow_field': False, 'maze': False, 'scheduled': False,
+                   'projectiles': True, 'threaded': False}
+SPEEDS = (1, 2, 4, 8, None)  # fast-forward steps with TAB; None runs as fast as the frame budget allows
+# Tower targeting modes (middle click cycles them): enemy attribute to maximize and its sign
+TARGETING = {
+    'first': ('progress', 1),
+    'last': ('progress', -1),
+    'strongest': ('health', 1),
+    'weakest': ('health', -1),
+}
 
 # Colors
 WHITE = (255, 255, 255)
@@ -35,7 +59,9 @@ TOWER_TYPES = {
         'cooldown': 30, 
         'color': BLUE,
         'size': 20,
-        'description': 'Balanced tower'
+        'description': 'Balanced tower',
+        'projectile_speed': 8,
+        'splash_radius': 0
     },
     'Sniper': {
         'cost': 200, 
@@ -44,7 +70,9 @@ TOWER_TYPES = {
         'cooldown': 60, 
         'color': YELLOW,
         'size': 25,
-        'description': 'Long range, high damage'
+        'description': 'Long range, high damage',
+        'projectile_speed': 20,
+        'splash_radius': 0
     },
     'Splash': {
         'cost': 150, 
@@ -53,7 +81,9 @@ TOWER_TYPES = {
         'cooldown': 45, 
         'color': PURPLE,
         'size': 22,
-        'description': 'Area damage'
+        'description': 'Area damage',
+        'projectile_speed': 6,
+        'splash_radius': 50
     }
 }
 
@@ -81,11 +111,155 @@ ENEMY_TYPES = {
     }
 }
 
+# Increasing id per spawned enemy, so "first in self.enemies" can be found without the list
+_spawn_counter = itertools.count()
+
+# Built on the first game with a screen, then shared
+_atlas: Optional[SpriteAtlas] = None
+
+def sprite_atlas() -> SpriteAtlas:
+    global _atlas
+    if _atlas is None:
+        _atlas = SpriteAtlas(TOWER_TYPES, ENEMY_TYPES)
+    return _atlas
+
+class SpatialGrid:
+    """Uniform grid hash of enemies, one bucket per TILE_SIZE cell."""
+
+    def __init__(self, cell_size: int = TILE_SIZE):
+        self.cell_size = cell_size
+        self.cells: Dict[Tuple[int, int], Set['Enemy']] = {}
+
+    def cell_of(self, x: float, y: float) -> Tuple[int, int]:
+        return (int(x // self.cell_size), int(y // self.cell_size))
+
+    def insert(self, enemy: 'Enemy'):
+        enemy.cell = self.cell_of(enemy.x, enemy.y)
+        self.cells.setdefault(enemy.cell, set()).add(enemy)
+
+    def remove(self, enemy: 'Enemy'):
+        bucket = self.cells.get(enemy.cell)
+        if bucket is not None:
+            bucket.discard(enemy)
+            if not bucket:
+                del self.cells[enemy.cell]
+
+    def move(self, enemy: 'Enemy'):
+        # Only touch the buckets when the enemy actually crossed into another cell
+        cell = self.cell_of(enemy.x, enemy.y)
+        if cell != enemy.cell:
+            self.remove(enemy)
+            enemy.cell = cell
+            self.cells.setdefault(cell, set()).add(enemy)
+
+    def target_in_range(self, x: float, y: float, radius: float,
+                        targeting: str = 'first') -> Optional['Enemy']:
+        # Only the cells inside the range are visited and the best enemy is kept on the
+        # way, so no enemy list is scanned or sorted; ties go to the oldest enemy
+        attr, sign = TARGETING[targeting]
+        min_cx, min_cy = self.cell_of(x - radius, y - radius)
+        max_cx, max_cy = self.cell_of(x + radius, y + radius)
+        radius_sq = radius * radius
+        best = None
+        best_key = 0.0
+        for bucket in self._buckets(min_cx, min_cy, max_cx, max_cy):
+            for enemy in bucket:
+                dx = enemy.x - x
+                dy = enemy.y - y
+                if dx * dx + dy * dy > radius_sq:
+                    continue
+                key = sign * getattr(enemy, attr)
+                if (best is None or key > best_key
+                        or (key == best_key and enemy.spawn_order < best.spawn_order)):
+                    best = enemy
+                    best_key = key
+        return best
+
+    def in_radius(self, x: float, y: float, radius: float) -> List['Enemy']:
+        # Every enemy within radius, e.g. for splash damage
+        min_cx, min_cy = self.cell_of(x - radius, y - radius)
+        max_cx, max_cy = self.cell_of(x + radius, y + radius)
+        radius_sq = radius * radius
+        found = []
+        for bucket in self._buckets(min_cx, min_cy, max_cx, max_cy):
+            for enemy in bucket:
+                dx = enemy.x - x
+                dy = enemy.y - y
+                if dx * dx + dy * dy <= radius_sq:
+                    found.append(enemy)
+        return found
+
+    def _buckets(self, min_cx: int, min_cy: int, max_cx: int, max_cy: int):
+        # Big ranges over a sparse grid: walking the occupied cells is cheaper than the box
+        if len(self.cells) < (max_cx - min_cx + 1) * (max_cy - min_cy + 1):
+            for (cx, cy), bucket in self.cells.items():
+                if min_cx <= cx <= max_cx and min_cy <= cy <= max_cy:
+                    yield bucket
+        else:
+            for cx in range(min_cx, max_cx + 1):
+                for cy in range(min_cy, max_cy + 1):
+                    bucket = self.cells.get((cx, cy))
+                    if bucket:
+                        yield bucket
+
+class OccupancyGrid:
+    """What stands on each tile of the play area: free, path or a tower.
+
+    Placement checks, snapping and "which tower is under the cursor" are one
+    lookup each, for clicks as well as for hover previews drawn every frame.
+    """
+
+    FREE = 0
+    PATH = 1
+    TOWER = 2
+
+    def __init__(self, cols: int, rows: int, tile_size: int = TILE_SIZE,
+                 path: Sequence[Tile] = ()):
+        self.cols = cols
+        self.rows = rows
+        self.tile_size = tile_size
+        self.state = bytearray(cols * rows)
+        self.towers: List[Optional['Tower']] = [None] * (cols * rows)
+        for col, row in path:
+            if col < cols and row < rows:
+                self.state[row * cols + col] = self.PATH
+
+    def tile_at(self, x: float, y: float) -> Optional[Tile]:
+        # None outside the play area, e.g. over the shop
+        col = int(x // self.tile_size)
+        row = int(y // self.tile_size)
+        if 0 <= col < self.cols and 0 <= row < self.rows:
+            return (col, row)
+        return None
+
+    def center(self, tile: Tile) -> Tuple[int, int]:
+        return (tile[0] * self.tile_size + self.tile_size // 2,
+                tile[1] * self.tile_size + self.tile_size // 2)
+
+    def is_free(self, tile: Tile) -> bool:
+        return self.state[tile[1] * self.cols + tile[0]] == self.FREE
+
+    def place(self, tile: Tile, tower: 'Tower'):
+        i = tile[1] * self.cols + tile[0]
+        self.state[i] = self.TOWER
+        self.towers[i] = tower
+
+    def tower_at(self, x: float, y: float) -> Optional['Tower']:
+        tile = self.tile_at(x, y)
+        if tile is None:
+            return None
+        return self.towers[tile[1] * self.cols + tile[0]]
+
 class Tower:
-    def __init__(self, x: int, y: int, tower_type: str):
+    __slots__ = ('x', 'y', 'type', 'range', 'damage', 'cooldown', 'cooldown_timer',
+                 'level', 'color', 'size', 'upgrade_cost', 'projectile_speed', 'splash_radius',
+                 'targeting')
+
+    def __init__(self, x: int, y: int, tower_type: str, targeting: str = 'first'):
         self.x = x
         self.y = y
         self.type = tower_type
+        self.targeting = targeting
         self.range = TOWER_TYPES[tower_type]['range']
         self.damage = TOWER_TYPES[tower_type]['damage']
         self.cooldown = TOWER_TYPES[tower_type]['cooldown']
@@ -94,22 +268,8 @@ class Tower:
         self.color = TOWER_TYPES[tower_type]['color']
         self.size = TOWER_TYPES[tower_type]['size']
         self.upgrade_cost = TOWER_TYPES[tower_type]['cost']
-
-    def draw(self, screen):
-        # Draw base
-        pygame.draw.circle(screen, (50, 50, 50), (self.x, self.y), self.size + 2)
-        # Draw tower
-        pygame.draw.circle(screen, self.color, (self.x, self.y), self.size)
-        # Draw level indicator
-        font = pygame.font.Font(None, 20)
-        level_text = font.render(str(self.level), True, WHITE)
-        text_rect = level_text.get_rect(center=(self.x, self.y))
-        screen.blit(level_text, text_rect)
-        # Draw range circle with transparency
-        range_surface = pygame.Surface((self.range * 2, self.range * 2), pygame.SRCALPHA)
-        pygame.draw.circle(range_surface, (100, 100, 100, 50), 
-                         (self.range, self.range), self.range)
-        screen.blit(range_surface, (self.x - self.range, self.y - self.range))
+        self.projectile_speed = TOWER_TYPES[tower_type]['projectile_speed']
+        self.splash_radius = TOWER_TYPES[tower_type]['splash_radius']
 
     def upgrade(self):
         self.level += 1
@@ -119,14 +279,33 @@ class Tower:
         self.upgrade_cost *= 2
         self.size += 2
 
+    def cycle_targeting(self):
+        modes = list(TARGETING)
+        self.targeting = modes[(modes.index(self.targeting) + 1) % len(modes)]
+
     def can_shoot(self, enemy) -> bool:
-        distance = math.sqrt((self.x - enemy.x)**2 + (self.y - enemy.y)**2)
-        return distance <= self.range and self.cooldown_timer <= 0
+        dx = self.x - enemy.x
+        dy = self.y - enemy.y
+        return dx * dx + dy * dy <= self.range * self.range and self.cooldown_timer <= 0
 
 class Enemy:
-    def __init__(self, path: List[Tuple[int, int]], enemy_type: str):
+    # Slots instead of a __dict__ per enemy, late waves create a lot of them
+    __slots__ = ('spawn_order', 'path', 'path_index', 'progress', 'x', 'y', 'type', 'health',
+                 'max_health', 'speed', 'value', 'color', 'size', 'grid', 'cell', 'flow', 'active')
+
+    def __init__(self, path: List[Tuple[int, int]], enemy_type: str, grid: Optional[SpatialGrid] = None,
+                 flow: Optional[FlowField] = None):
+        self.reset(path, enemy_type, grid, flow)
+
+    def reset(self, path: List[Tuple[int, int]], enemy_type: str, grid: Optional[SpatialGrid] = None,
+              flow: Optional[FlowField] = None):
+        self.active = True
+        self.spawn_order = next(_spawn_counter)
         self.path = path
         self.path_index = 0
+        # Distance covered along the path (minus the distance left to the exit on flow fields);
+        # the higher, the further ahead, which is what "first"/"last" targeting compare
+        self.progress = 0.0
         self.x = path[0][0]
         self.y = path[0][1]
         self.type = enemy_type
@@ -136,8 +315,15 @@ class Enemy:
         self.value = ENEMY_TYPES[enemy_type]['value']
         self.color = ENEMY_TYPES[enemy_type]['color']
         self.size = ENEMY_TYPES[enemy_type]['size']
+        self.grid = grid
+        self.cell = None
+        if grid is not None:
+            grid.insert(self)
+        self.flow = flow
 
     def move(self) -> bool:
+        if self.flow is not None:
+            return self.move_flow()
         if self.path_index >= len(self.path) - 1:
             return False
 
@@ -153,32 +339,162 @@ class Enemy:
         else:
             self.x += (dx/distance) * self.speed
             self.y += (dy/distance) * self.speed
+            self.progress += self.speed
+            if self.grid is not None:
+                self.grid.move(self)
         return True
 
-    def draw(self, screen):
-        # Draw enemy
-        pygame.draw.circle(screen, self.color, (int(self.x), int(self.y)), self.size)
-        # Draw health bar with background
-        bar_width = 40
-        pygame.draw.rect(screen, (50, 50, 50), 
-                        (int(self.x) - bar_width//2, int(self.y) - self.size - 10, 
-                         bar_width, 5))
-        pygame.draw.rect(screen, GREEN, 
-                        (int(self.x) - bar_width//2, int(self.y) - self.size - 10, 
-                         bar_width * (self.health/self.max_health), 5))
-
-class Game:
+    def move_flow(self) -> bool:
+        # Walk from tile center to tile center as the flow field says, leak at the exit
+        target_x, target_y, is_exit = self.flow.next_step(self.x, self.y)
+        dx = target_x - self.x
+        dy = target_y - self.y
+        distance = math.sqrt(dx**2 + dy**2)
+
+        if distance < self.speed:
+            if is_exit:
+                return False
+            self.x = target_x
+            self.y = target_y
+        else:
+            self.x += (dx/distance) * self.speed
+            self.y += (dy/distance) * self.speed
+        # Routes change when towers block tiles, so progress is what is left to walk
+        self.progress = -self.flow.dist[self.flow.tile_at(self.x, self.y)]
+        if self.grid is not None:
+            self.grid.move(self)
+        return True
+
+def enemy_bounds(enemy) -> pygame.Rect:
+    # Screen area covered by an enemy's sprites: body circle plus the health bar above it
+    x, y, size = int(enemy.x), int(enemy.y), enemy.size
+    body = pygame.Rect(x - size, y - size, size * 2 + 1, size * 2 + 1)
+    return body.union(pygame.Rect(x - 20, y - size - 10, 40, 5)).inflate(2, 2)
+
+class TowerState(NamedTuple):
+    x: int
+    y: int
+    color: Tuple[int, int, int]
+    size: int
+    level: int
+    range: float
+
+class EnemyState(NamedTuple):
+    spawn_order: int
+    x: float
+    y: float
+    color: Tuple[int, int, int]
+    size: int
+    health: float
+    max_health: float
+
+class ShotState(NamedTuple):
+    x: float
+    y: float
+    color: Tuple[int, int, int]
+
+class GameSnapshot(NamedTuple):
+    """Everything draw needs from one tick, immutable so another thread can read it."""
+    time: float
+    money: int
+    lives: int
+    wave: int
+    game_started: bool
+    wave_in_progress: bool
+    wave_countdown: int
+    speed: Optional[int]
+    selected_tower: str
+    towers: Tuple[TowerState, ...]
+    enemies: Tuple[EnemyState, ...]
+    shots: Tuple[ShotState, ...]
+
+def interpolate(prev: Optional[GameSnapshot], cur: GameSnapshot, alpha: float) -> GameSnapshot:
+    """Enemies moved alpha of the way from prev to cur; everything else from cur."""
+    if prev is None or alpha >= 1:
+        return cur
+    before = {enemy.spawn_order: enemy for enemy in prev.enemies}
+    enemies = []
+    for enemy in cur.enemies:
+        old = before.get(enemy.spawn_order)
+        if old is not None:
+            enemy = enemy._replace(x=old.x + (enemy.x - old.x) * alpha, y=old.y + (enemy.y - old.y) * alpha)
+        enemies.append(enemy)
+    return cur._replace(enemies=tuple(enemies))
+
+class SimResult(NamedTuple):
+    money: int
+    lives: int
+    wave: int
+    ticks: int
+
+class EnemyPool:
+    """Free list of dead enemies that spawn_enemy recycles instead of allocating new ones."""
+
     def __init__(self):
-        self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
-        pygame.display.set_caption("Tower Defense")
-        self.clock = pygame.time.Clock()
+        self.free: List[Enemy] = []
+
+    def acquire(self, path: List[Tuple[int, int]], enemy_type: str, grid: Optional[SpatialGrid] = None,
+                flow: Optional[FlowField] = None) -> Enemy:
+        if self.free:
+            enemy = self.free.pop()
+            enemy.reset(path, enemy_type, grid, flow)
+            return enemy
+        return Enemy(path, enemy_type, grid, flow)
+
+    def release(self, enemy: Enemy):
+        enemy.active = False
+        enemy.grid = None
+        enemy.flow = None
+        self.free.append(enemy)
+
+class Game(Scene):
+    overlay_pos = PROFILER_POS
+
+    def __init__(self, batched: bool = False, headless: bool = False, seed: Optional[int] = None,
+                 dirty_rects: bool = False, flow_field: bool = False, maze: bool = False,
+                 scheduled: bool = False, projectiles: bool = False,
+                 screen: Optional[pygame.Surface] = None):
+        self.headless = headless
+        # Without a screen from the hub the game opens (and later closes) its own window
+        self.owns_display = screen is None and not headless
+        # Seeded games get their own generator so runs are reproducible
+        self.rng = random if seed is None else random.Random(seed)
+        if headless:
+            self.screen = None
+        else:
+            if screen is None:
+                pygame.init()
+                screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+            self.screen = screen
+            pygame.display.set_caption("Tower Defense")
+        Scene.__init__(self, self.screen)
         self.towers: List[Tower] = []
         self.enemies: List[Enemy] = []
+        self.grid = SpatialGrid(TILE_SIZE)
+        self.enemy_pool = EnemyPool()
         self.money = 300
         self.lives = 20
         self.wave = 1
         self.enemy_spawn_timer = 0
         self.path = [(0, 300), (300, 300), (300, 100), (500, 100), (500, 500), (800, 500)]
+        # Tile based pathing: enemies follow a flow field, on maze maps towers reroute them
+        self.maze = maze
+        self.flow = None
+        if flow_field or maze:
+            if batched:
+                raise ValueError("the batched engine only supports waypoint paths")
+            self.flow = FlowField.from_path(self.path, WINDOW_WIDTH, WINDOW_HEIGHT, TILE_SIZE, open_field=maze)
+        # Towers sit on whole tiles left of the shop; the fixed path is off limits
+        # (on maze maps the flow field decides which tiles may still be blocked)
+        cols, rows = (WINDOW_WIDTH - 150) // TILE_SIZE, WINDOW_HEIGHT // TILE_SIZE
+        route = () if maze else path_tiles(self.path, WINDOW_WIDTH // TILE_SIZE, rows, TILE_SIZE)
+        self.tiles = OccupancyGrid(cols, rows, TILE_SIZE, route)
+        # Optional NumPy engine; self.enemies then becomes a list-like view over its arrays
+        self.enemy_batch = None
+        if batched:
+            from enemy_batch import EnemyBatch
+            self.enemy_batch = EnemyBatch(self.path)
+            self.enemies = self.enemy_batch
         self.selected_tower = 'Basic'
         # Updated shop buttons with more space
         self.shop_buttons = [
@@ -186,11 +502,36 @@ class Game:
             pygame.Rect(WINDOW_WIDTH - 140, 80, 130, 60),
             pygame.Rect(WINDOW_WIDTH - 140, 150, 130, 60)
         ]
+        self.shop_rect = pygame.Rect(WINDOW_WIDTH - 150, 0, 150, WINDOW_HEIGHT)
+        self.play_rect = pygame.Rect(0, 0, WINDOW_WIDTH - 150, WINDOW_HEIGHT)
+        # Dirty-rect mode: what is already on screen, so the next frame only redraws changes
+        self.dirty_rects = dirty_rects
+        self.static_layer = None
+        self.static_towers = []
+        self.static_shop = None
+        self.pending_rects: List[pygame.Rect] = []
+        self.last_enemy_rects: List[pygame.Rect] = []
+        self.last_hud_rects: List[pygame.Rect] = []
+        self.last_hud_texts: List[pygame.Surface] = []
         self.wave_countdown = GAME_START_DELAY
         self.game_started = False
         self.wave_in_progress = False
-        self.background = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
-        self.create_background()
+        # Event queue for waves instead of the countdowns in spawn_enemy
+        self.scheduler = WaveScheduler(GAME_START_DELAY, WAVE_DELAY, WAVE_DURATION) if scheduled else None
+        # Set by run() when profiling; update() then times its parts too
+        self.profiler: Optional[FrameProfiler] = None
+        # Shots with travel time and splash damage instead of instant hits
+        self.projectiles = None
+        if projectiles:
+            if batched:
+                raise ValueError("the batched engine only supports instant hits")
+            self.projectiles = ProjectileSystem(self.grid)
+        self.background = None
+        self.atlas = None
+        if not headless:
+            self.background = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
+            self.create_background()
+            self.atlas = sprite_atlas()
 
     def create_background(self):
         # Create grass background
@@ -202,6 +543,10 @@ class Game:
         for y in range(0, WINDOW_HEIGHT, 40):
             pygame.draw.line(self.background, GRID_COLOR, (0, y), (WINDOW_WIDTH, y))
         
+        # On maze maps the towers make the path
+        if self.maze:
+            return
+
         # Draw path with better visuals
         for i in range(len(self.path) - 1):
             start = self.path[i]
@@ -218,7 +563,17 @@ class Game:
                 y = start[1] + (end[1] - start[1]) * step / steps
                 pygame.draw.circle(self.background, BLACK, (int(x), int(y)), 2)
 
+    def add_enemy(self, enemy_type: str):
+        if self.enemy_batch is not None:
+            self.enemy_batch.spawn(enemy_type)
+        else:
+            self.enemies.append(self.enemy_pool.acquire(self.path, enemy_type, self.grid, self.flow))
+
     def spawn_enemy(self):
+        if self.scheduler is not None:
+            self.scheduler.tick(self)
+            return
+
         # Initial game start
         if not self.game_started:
             if self.wave_countdown > 0:
@@ -244,10 +599,10 @@ class Game:
             if self.enemy_spawn_timer <= 0 and len(self.enemies) < self.wave * 5:
                 enemy_type = 'Normal'
                 if self.wave >= 3:
-                    enemy_type = 'Fast' if random.random() < 0.3 else 'Normal'
+                    enemy_type = 'Fast' if self.rng.random() < 0.3 else 'Normal'
                 if self.wave >= 5:
-                    enemy_type = random.choice(['Normal', 'Fast', 'Tank'])
-                self.enemies.append(Enemy(self.path, enemy_type))
+                    enemy_type = self.rng.choice(['Normal', 'Fast', 'Tank'])
+                self.add_enemy(enemy_type)
                 self.enemy_spawn_timer = 60
 
             self.enemy_spawn_timer -= 1
@@ -262,137 +617,468 @@ class Game:
                 self.wave_countdown = WAVE_DURATION
                 self.enemy_spawn_timer = 0
 
-    def handle_events(self):
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                return False
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                mouse_x, mouse_y = pygame.mouse.get_pos()
-                
-                # Check shop buttons
-                for i, button in enumerate(self.shop_buttons):
-                    if button.collidepoint(mouse_x, mouse_y):
-                        self.selected_tower = list(TOWER_TYPES.keys())[i]
-                        return True
-
-                # Place tower
-                if event.button == 1 and mouse_x < WINDOW_WIDTH - 150:  # Left click
-                    tower_cost = TOWER_TYPES[self.selected_tower]['cost']
-                    if self.money >= tower_cost:
-                        self.towers.append(Tower(mouse_x, mouse_y, self.selected_tower))
-                        self.money -= tower_cost
-                
-                # Upgrade tower
-                elif event.button == 3:  # Right click
-                    for tower in self.towers:
-                        distance = math.sqrt((mouse_x - tower.x)**2 + (mouse_y - tower.y)**2)
-                        if distance < tower.size and self.money >= tower.upgrade_cost:
-                            self.money -= tower.upgrade_cost
-                            tower.upgrade()
+    def activate(self):
+        pygame.display.set_caption("Tower Defense")
+        # update() times its parts when the runtime is profiling
+        self.profiler = self.runtime.profiler
+
+    def snapshot(self, now: float) -> GameSnapshot:
+        shots = ()
+        if self.projectiles is not None:
+            shots = tuple(ShotState(shot.x, shot.y, shot.color) for shot in self.projectiles.projectiles)
+        return GameSnapshot(
+            now, self.money, self.lives, self.wave, self.game_started, self.wave_in_progress,
+            self.wave_countdown, self.speed, self.selected_tower,
+            tuple(TowerState(tower.x, tower.y, tower.color, tower.size, tower.level, tower.range)
+                  for tower in self.towers),
+            tuple(EnemyState(enemy.spawn_order, enemy.x, enemy.y, enemy.color, enemy.size,
+                             enemy.health, enemy.max_health) for enemy in self.enemies),
+            shots)
+
+    def handle_event(self, event):
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_TAB:
+            # Fast-forward: more fixed updates per frame, the simulation itself is unchanged
+            self.speed = SPEEDS[(SPEEDS.index(self.speed) + 1) % len(SPEEDS)]
+            return
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            mouse_x, mouse_y = to_local(self.screen, event.pos)
+            
+            # Check shop buttons
+            for i, button in enumerate(self.shop_buttons):
+                if button.collidepoint(mouse_x, mouse_y):
+                    self.selected_tower = list(TOWER_TYPES.keys())[i]
+                    return
+
+            # Place tower
+            if event.button == 1 and mouse_x < WINDOW_WIDTH - 150:  # Left click
+                self.place_tower(mouse_x, mouse_y, self.selected_tower)
+            
+            # Upgrade tower
+            elif event.button == 3:  # Right click
+                tower = self.tiles.tower_at(mouse_x, mouse_y)
+                if tower is not None and self.money >= tower.upgrade_cost:
+                    self.money -= tower.upgrade_cost
+                    tower.upgrade()
+
+            # Switch targeting mode
+            elif event.button == 2:  # Middle click
+                tower = self.tiles.tower_at(mouse_x, mouse_y)
+                if tower is not None:
+                    tower.cycle_targeting()
+
+    def invalidate(self, rect: pygame.Rect):
+        self.pending_rects.append(rect)
+
+    def placement_tile(self, x: float, y: float) -> Optional[Tile]:
+        """The tile a tower clicked at (x, y) would stand on, or None if it may not go there."""
+        tile = self.tiles.tile_at(x, y)
+        if tile is None or not self.tiles.is_free(tile):
+            return None
+        # Towers may not cut the enemies off from the exit; only tiles on the current
+        # route can do that, so the trial block in can_block is skipped for all others
+        if self.flow is not None and self.flow.on_route(tile) and not self.flow.can_block(tile):
+            return None
+        return tile
+
+    def place_tower(self, x: int, y: int, tower_type: str) -> bool:
+        tower_cost = TOWER_TYPES[tower_type]['cost']
+        if self.money < tower_cost:
+            return False
+        tile = self.placement_tile(x, y)
+        if tile is None:
+            return False
+        if self.flow is not None:
+            self.flow.block(tile)
+        tower = Tower(*self.tiles.center(tile), tower_type)
+        self.tiles.place(tile, tower)
+        self.towers.append(tower)
+        self.money -= tower_cost
         return True
 
     def update(self):
-        # Update enemies
-        for enemy in self.enemies[:]:
+        # Fast-forward at max also jumps over idle stretches in one update
+        if self.speed is None and self.skip_idle(WAVE_DURATION):
+            return
+        if self.enemy_batch is not None:
+            self.update_batched()
+            return
+
+        # Update enemies; survivors are compacted to the front so the order stays the same
+        enemies = self.enemies
+        kept = 0
+        for i in range(len(enemies)):
+            enemy = enemies[i]
             if not enemy.move():
                 self.lives -= 1
-                self.enemies.remove(enemy)
+                self.grid.remove(enemy)
+                self.enemy_pool.release(enemy)
                 continue
 
             if enemy.health <= 0:
                 self.money += enemy.value
-                self.enemies.remove(enemy)
+                self.grid.remove(enemy)
+                self.enemy_pool.release(enemy)
+                continue
+
+            enemies[kept] = enemy
+            kept += 1
+        del enemies[kept:]
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.mark('enemies')
 
-        # Update towers
+        # Update towers, only looking at the grid cells inside each tower's range
         for tower in self.towers:
             if tower.cooldown_timer > 0:
                 tower.cooldown_timer -= 1
+                if tower.cooldown_timer > 0:
+                    continue
 
-            for enemy in self.enemies:
-                if tower.can_shoot(enemy):
-                    enemy.health -= tower.damage
-                    tower.cooldown_timer = tower.cooldown
-                    break
+            target = self.grid.target_in_range(tower.x, tower.y, tower.range, tower.targeting)
+            if target is not None:
+                if self.projectiles is not None:
+                    self.projectiles.fire(tower, target)
+                else:
+                    target.health -= tower.damage
+                tower.cooldown_timer = tower.cooldown
+
+        if profiler is not None:
+            profiler.mark('towers')
+        if self.projectiles is not None:
+            self.projectiles.update()
+            if profiler is not None:
+                profiler.mark('shots')
 
         # Spawn enemies
         self.spawn_enemy()
 
-    def draw(self):
-        # Draw background
-        self.screen.blit(self.background, (0, 0))
-        
-        # Draw game objects
+        # Game over: back to whatever was below (the hub) or end the standalone loop
+        if self.lives <= 0 and self.runtime is not None:
+            self.runtime.pop(self)
+
+    def update_batched(self):
+        # Same rules as update(), but enemies move, leak and die as whole arrays
+        leaked, earned = self.enemy_batch.step()
+        self.lives -= leaked
+        self.money += earned
+
         for tower in self.towers:
-            tower.draw(self.screen)
-        for enemy in self.enemies:
-            enemy.draw(self.screen)
+            if tower.cooldown_timer > 0:
+                tower.cooldown_timer -= 1
+                if tower.cooldown_timer > 0:
+                    continue
 
-        # Draw UI
-        font = pygame.font.Font(None, 36)
-        money_text = font.render(f"Money: ${self.money}", True, BLACK)
-        lives_text = font.render(f"Lives: {self.lives}", True, BLACK)
-        wave_text = font.render(f"Wave: {self.wave}", True, BLACK)
-        self.screen.blit(money_text, (10, 10))
-        self.screen.blit(lives_text, (10, 40))
-        self.screen.blit(wave_text, (10, 70))
+            target = self.enemy_batch.target_in_range(tower.x, tower.y, tower.range, tower.targeting)
+            if target >= 0:
+                self.enemy_batch.health[target] -= tower.damage
+                tower.cooldown_timer = tower.cooldown
+
+        self.spawn_enemy()
+
+    def hud_items(self, state=None) -> List[Tuple[pygame.Surface, pygame.Rect]]:
+        # Money, lives, wave and the countdown as (surface, rect) pairs, from the game or a snapshot
+        if state is None:
+            state = self
+        items = []
+        labels = [f"Money: ${state.money}", f"Lives: {state.lives}", f"Wave: {state.wave}"]
+        if state.speed != 1:
+            labels.append("Speed: max" if state.speed is None else f"Speed: {state.speed}x")
+        for i, label in enumerate(labels):
+            text = render_cache.render_text(label, 36, BLACK)
+            items.append((text, text.get_rect(topleft=(10, 10 + i * 30))))
 
         # Draw wave countdown
-        if not self.game_started:
-            countdown = f"Game starts in: {self.wave_countdown // 60 + 1}"
-            text = font.render(countdown, True, BLACK)
-            text_rect = text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2))
-            self.screen.blit(text, text_rect)
-        elif not self.wave_in_progress and self.wave_countdown > 0:
-            countdown = f"Next wave in: {self.wave_countdown // 60 + 1}"
-            text = font.render(countdown, True, BLACK)
-            text_rect = text.get_rect(center=(WINDOW_WIDTH // 2, 100))
-            self.screen.blit(text, text_rect)
+        if not state.game_started:
+            countdown = f"Game starts in: {state.wave_countdown // 60 + 1}"
+            text = render_cache.render_text(countdown, 36, BLACK)
+            items.append((text, text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2))))
+        elif not state.wave_in_progress and state.wave_countdown > 0:
+            countdown = f"Next wave in: {state.wave_countdown // 60 + 1}"
+            text = render_cache.render_text(countdown, 36, BLACK)
+            items.append((text, text.get_rect(center=(WINDOW_WIDTH // 2, 100))))
+        return items
 
-        # Draw shop
-        shop_bg = pygame.Rect(WINDOW_WIDTH - 150, 0, 150, WINDOW_HEIGHT)
-        pygame.draw.rect(self.screen, (240, 240, 240), shop_bg)
-        pygame.draw.line(self.screen, BLACK, (WINDOW_WIDTH - 150, 0), 
+    def draw_shop(self, surface: pygame.Surface, mouse_pos: Tuple[int, int],
+                  selected_tower: Optional[str] = None):
+        if selected_tower is None:
+            selected_tower = self.selected_tower
+        pygame.draw.rect(surface, (240, 240, 240), self.shop_rect)
+        pygame.draw.line(surface, BLACK, (WINDOW_WIDTH - 150, 0), 
                         (WINDOW_WIDTH - 150, WINDOW_HEIGHT), 2)
 
-        font = pygame.font.Font(None, 24)
         for i, (tower_type, info) in enumerate(TOWER_TYPES.items()):
             button = self.shop_buttons[i]
             # Draw button with hover effect
-            mouse_pos = pygame.mouse.get_pos()
             if button.collidepoint(mouse_pos):
-                pygame.draw.rect(self.screen, (220, 220, 220), button)
+                pygame.draw.rect(surface, (220, 220, 220), button)
             else:
-                pygame.draw.rect(self.screen, WHITE, button)
-            pygame.draw.rect(self.screen, BLACK, button, 2)
+                pygame.draw.rect(surface, WHITE, button)
+            pygame.draw.rect(surface, BLACK, button, 2)
             
             # Draw tower preview and info
-            pygame.draw.circle(self.screen, info['color'], 
+            pygame.draw.circle(surface, info['color'], 
                              (button.x + 25, button.y + 30), info['size'])
-            name_text = font.render(tower_type, True, BLACK)
-            cost_text = font.render(f"${info['cost']}", True, BLACK)
-            self.screen.blit(name_text, (button.x + 50, button.y + 10))
-            self.screen.blit(cost_text, (button.x + 50, button.y + 35))
+            name_text = render_cache.render_text(tower_type, 24, BLACK)
+            cost_text = render_cache.render_text(f"${info['cost']}", 24, BLACK)
+            surface.blit(name_text, (button.x + 50, button.y + 10))
+            surface.blit(cost_text, (button.x + 50, button.y + 35))
 
         # Draw selected tower info and description
-        if self.selected_tower:
-            info_text = font.render(f"Selected: {self.selected_tower}", True, BLACK)
-            desc_text = font.render(TOWER_TYPES[self.selected_tower]['description'], 
-                                  True, BLACK)
-            self.screen.blit(info_text, (WINDOW_WIDTH - 140, WINDOW_HEIGHT - 60))
-            self.screen.blit(desc_text, (WINDOW_WIDTH - 140, WINDOW_HEIGHT - 30))
-
-        pygame.display.flip()
-
-    def run(self):
-        running = True
-        while running and self.lives > 0:
-            running = self.handle_events()
+        if selected_tower:
+            info_text = render_cache.render_text(f"Selected: {selected_tower}", 24, BLACK)
+            desc_text = render_cache.render_text(TOWER_TYPES[selected_tower]['description'], 24, BLACK)
+            surface.blit(info_text, (WINDOW_WIDTH - 140, WINDOW_HEIGHT - 60))
+            surface.blit(desc_text, (WINDOW_WIDTH - 140, WINDOW_HEIGHT - 30))
+
+    def hovered_button(self, mouse_pos: Tuple[int, int]) -> int:
+        for i, button in enumerate(self.shop_buttons):
+            if button.collidepoint(mouse_pos):
+                return i
+        return -1
+
+    def draw(self) -> Optional[List[pygame.Rect]]:
+        if self.dirty_rects:
+            return self.draw_dirty()
+
+        shots = self.projectiles.projectiles if self.projectiles is not None else ()
+        self.draw_full(self.towers, self.enemies, shots)
+        return None
+
+    def draw_full(self, towers, enemies, shots, state=None):
+        # Draw background
+        self.screen.blit(self.background, (0, 0))
+        
+        # Draw game objects from the sprite atlas in one batch
+        batch = []
+        self.atlas.add_towers(batch, towers)
+        self.atlas.add_enemies(batch, enemies)
+        self.atlas.add_projectiles(batch, shots)
+        self.screen.blits(batch, doreturn=False)
+
+        # Draw UI
+        for text, rect in self.hud_items(state):
+            self.screen.blit(text, rect)
+
+        # Draw shop
+        selected = state.selected_tower if state is not None else None
+        self.draw_shop(self.screen, to_local(self.screen, pygame.mouse.get_pos()), selected)
+
+    def build_static_layer(self, mouse_pos: Tuple[int, int]):
+        # Everything that only changes on clicks: background, towers and the shop panel
+        if self.static_layer is None:
+            self.static_layer = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
+        self.static_layer.blit(self.background, (0, 0))
+        batch = []
+        self.atlas.add_towers(batch, self.towers)
+        self.static_layer.blits(batch, doreturn=False)
+        self.draw_shop(self.static_layer, mouse_pos)
+
+    def draw_dirty(self) -> List[pygame.Rect]:
+        # Only the screen regions that changed since the last frame are redrawn and returned
+        mouse_pos = to_local(self.screen, pygame.mouse.get_pos())
+        hovered = self.hovered_button(mouse_pos)
+        tower_state = [(tower.x, tower.y, tower.level) for tower in self.towers]
+        shop_state = (hovered, self.selected_tower)
+
+        full_redraw = self.static_layer is None or tower_state != self.static_towers
+        if full_redraw:
+            self.build_static_layer(mouse_pos)
+            self.static_towers = tower_state
+            self.static_shop = shop_state
+        elif shop_state != self.static_shop:
+            self.draw_shop(self.static_layer, mouse_pos)
+            self.static_shop = shop_state
+            self.pending_rects.append(self.shop_rect)
+
+        moving = [enemy_bounds(enemy) for enemy in self.enemies]
+        if self.projectiles is not None:
+            moving += [projectile.bounds() for projectile in self.projectiles.projectiles]
+        enemy_rects = []
+        for rect in moving:
+            rect = rect.clip(self.play_rect)
+            if rect.width and rect.height:
+                enemy_rects.append(rect)
+
+        hud = self.hud_items()
+        hud_rects = [rect for _, rect in hud]
+        dirty = self.pending_rects + self.last_enemy_rects + enemy_rects
+        if hud_rects != self.last_hud_rects or [text for text, _ in hud] != self.last_hud_texts:
+            dirty += self.last_hud_rects + hud_rects
+
+        # Lots of small rects cost more than one big one
+        if full_redraw or len(dirty) > DIRTY_RECT_LIMIT:
+            dirty = [self.screen.get_rect()]
+
+        for rect in dirty:
+            self.screen.blit(self.static_layer, rect, rect)
+        batch = []
+        self.atlas.add_enemies(batch, self.enemies)
+        if self.projectiles is not None:
+            self.atlas.add_projectiles(batch, self.projectiles.projectiles)
+        self.screen.set_clip(self.play_rect)
+        self.screen.blits(batch, doreturn=False)
+        self.screen.set_clip(None)
+        for text, rect in hud:
+            if rect.collidelist(dirty) != -1:
+                self.screen.blit(text, rect)
+
+        self.pending_rects = []
+        self.last_enemy_rects = enemy_rects
+        self.last_hud_rects = hud_rects
+        self.last_hud_texts = [text for text, _ in hud]
+        return dirty
+
+    def run(self, profiler: Optional[FrameProfiler] = None, threaded: bool = False):
+        # Profiling is opt-in: pass a FrameProfiler or set $GAMES_PROFILE
+        if profiler is None:
+            profiler = FrameProfiler.from_env()
+        Runtime(profiler=profiler).run(ThreadedGame(self) if threaded else self)
+        if profiler is not None:
+            profiler.close()
+        if self.owns_display:
+            pygame.quit()
+
+    def skip_idle(self, max_ticks: int) -> int:
+        """Jump over ticks where nothing can happen until the next scheduled event.
+
+        Only possible with the wave scheduler and an empty field; towers just cool down.
+        """
+        if self.scheduler is None or len(self.enemies) > 0:
+            return 0
+        if self.projectiles is not None and len(self.projectiles) > 0:
+            return 0
+        skip = min(self.scheduler.next_event_tick() - self.scheduler.now, max_ticks)
+        if skip <= 0:
+            return 0
+        self.scheduler.now += skip
+        for tower in self.towers:
+            tower.cooldown_timer = max(tower.cooldown_timer - skip, 0)
+        self.wave_countdown = self.scheduler.countdown()
+        return skip
+
+    def simulate(self, ticks: int, build_order: Sequence[Tuple[int, int, str]] = ()) -> SimResult:
+        # Fixed-timestep loop without events, drawing or frame limiting.
+        # Towers from build_order are bought in order as soon as the money allows.
+        pending = list(build_order)
+        tick = 0
+        while tick < ticks and self.lives > 0:
+            while pending and self.money >= TOWER_TYPES[pending[0][2]]['cost']:
+                x, y, tower_type = pending.pop(0)
+                self.place_tower(x, y, tower_type)
+            skipped = self.skip_idle(ticks - tick)
+            if skipped:
+                tick += skipped
+                continue
             self.update()
-            self.draw()
-            self.clock.tick(60)
+            tick += 1
+        return SimResult(self.money, self.lives, self.wave, tick)
+
+class ThreadedGame(Scene):
+    """Plays a Game on a SimulationThread and draws interpolated snapshots of it.
+
+    Events are forwarded to the simulation thread, so the game's state is only ever
+    touched there; this scene only reads the immutable GameSnapshots. Slow frames
+    no longer delay ticks, and enemies move smoothly at any frame rate.
+    Only the full-redraw path is supported.
+    """
+
+    overlay_pos = PROFILER_POS
+
+    def __init__(self, game: Game):
+        if game.headless or game.enemy_batch is not None or game.dirty_rects:
+            raise ValueError("the threaded game needs a windowed game without batching or dirty rects")
+        super().__init__(game.screen)
+        self.game = game
+        self.sim = SimulationThread(self.step, game.snapshot, TICK_RATE, lambda: game.speed)
+
+    def step(self):
+        # Game over is handled by this scene on the render thread
+        if self.game.lives > 0:
+            self.game.update()
+
+    def activate(self):
+        pygame.display.set_caption("Tower Defense")
+        if not self.sim.is_alive() and not self.sim.stopping.is_set():
+            self.sim.start()
+
+    def handle_event(self, event):
+        game = self.game
+        self.sim.send(lambda: game.handle_event(event))
+
+    def update(self):
+        _, state = self.sim.buffer.latest()
+        if state.lives <= 0 and self.runtime is not None:
+            self.runtime.pop(self)
+
+    def draw(self) -> Optional[List[pygame.Rect]]:
+        prev, state = self.sim.buffer.latest()
+        alpha = (time.perf_counter() - state.time) / self.sim.period
+        state = interpolate(prev, state, min(max(alpha, 0.0), 1.0))
+        self.game.draw_full(state.towers, state.enemies, state.shots, state)
+        return None
+
+    def close(self):
+        self.sim.stop()
+
+def simulate(ticks: int, tower_layout: Sequence[Tuple[int, int, str]], seed: int,
+             batched: bool = False, maze: bool = False, scheduled: bool = False,
+             projectiles: bool = False) -> SimResult:
+    """Run one headless game for up to `ticks` updates and return the final state."""
+    game = Game(batched=batched, headless=True, seed=seed, maze=maze, scheduled=scheduled,
+                projectiles=projectiles)
+    return game.simulate(ticks, tower_layout)
+
+def game_options(**overrides: Optional[bool]) -> Dict[str, bool]:
+    """Options for the playable game: DEFAULT_OPTIONS, then $GAMES_TD, then the keywords.
+
+    $GAMES_TD is a comma separated list of options to switch on; "no_<option>"
+    switches one off. Keywords left at None keep the value from before.
+    """
+    options = dict(DEFAULT_OPTIONS)
+    for name in os.environ.get(OPTIONS_ENV, '').split(','):
+        name = name.strip()
+        if not name:
+            continue
+        value = not name.startswith('no_')
+        if not value:
+            name = name[3:]
+        if name not in options:
+            raise ValueError(f"unknown {OPTIONS_ENV} option: {name}")
+        options[name] = value
+    for name, value in overrides.items():
+        if name not in options:
+            raise ValueError(f"unknown game option: {name}")
+        if value is not None:
+            options[name] = value
+    return options
+
+def make_game(options: Dict[str, bool], screen: Optional[pygame.Surface] = None) -> Game:
+    return Game(dirty_rects=options['dirty_rects'], flow_field=options['flow_field'],
+                maze=options['maze'], scheduled=options['scheduled'],
+                projectiles=options['projectiles'], screen=screen)
+
+def make_scene(screen: pygame.Surface, **options: Optional[bool]) -> Scene:
+    """Scene for the hub, playing on its screen."""
+    options = game_options(**options)
+    game = make_game(options, screen)
+    return ThreadedGame(game) if options['threaded'] else game
 
-        pygame.quit()
+def start_game(profiler: Optional[FrameProfiler] = None, **options: Optional[bool]):
+    options = game_options(**options)
+    make_game(options).run(profiler, options['threaded'])
 
 if __name__ == "__main__":
-    game = Game()
-    game.run()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Tower Defense")
+    parser.add_argument("--dirty-rects", action="store_true", default=None,
+                        help="only redraw the parts of the screen that changed")
+    parser.add_argument("--flow-field", action="store_true", default=None,
+                        help="enemies follow a flow field over the tiles")
+    parser.add_argument("--maze", action="store_true", default=None,
+                        help="open field: towers may be built anywhere and enemies walk around them")
+    parser.add_argument("--scheduled", action="store_true", default=None,
+                        help="event-driven waves; max fast-forward skips the quiet stretches")
+    parser.add_argument("--projectiles", action=argparse.BooleanOptionalAction, default=None,
+                        help="shots fly to their target and splash (on by default)")
+    parser.add_argument("--threaded", action="store_true", default=None,
+                        help="run the simulation on its own thread and draw interpolated frames")
+    start_game(**vars(parser.parse_args()))
\ No newline at end of file
@@ -0,0 +1,95 @@
+import heapq
+import itertools
+from typing import Callable, List, NamedTuple, Tuple
+
+# Event kinds in the queue
+WAVE_START = 0
+SPAWN = 1
+
+SPAWN_INTERVAL = 60    # ticks between two spawns of a wave
+ENEMIES_PER_WAVE = 5   # at most wave * this many enemies alive at once
+WAVE_BONUS = 100
+
+
+class WaveSpec(NamedTuple):
+    duration: int                        # ticks the wave lasts at least; it ends once the field is clear
+    interval: int                        # ticks between spawns
+    max_alive: int                       # a due spawn waits while this many enemies are alive
+    bonus: int                           # money for clearing the wave
+    enemy_type: Callable[[object], str]  # type of the next spawn, drawn from the game's rng
+
+
+def default_wave(wave: int, duration: int) -> WaveSpec:
+    """The classic waves: a spawn per second for `duration` ticks, at most wave * 5 alive,
+    tougher mix from wave 3 and 5."""
+    def enemy_type(rng) -> str:
+        enemy_type = 'Normal'
+        if wave >= 3:
+            enemy_type = 'Fast' if rng.random() < 0.3 else 'Normal'
+        if wave >= 5:
+            enemy_type = rng.choice(['Normal', 'Fast', 'Tank'])
+        return enemy_type
+    return WaveSpec(duration, SPAWN_INTERVAL, wave * ENEMIES_PER_WAVE, WAVE_BONUS, enemy_type)
+
+
+class WaveScheduler:
+    """Runs waves from a priority queue of timed events instead of per-tick countdowns.
+
+    Same rules and tick timing as the countdowns in Game.spawn_enemy: the wave
+    spawns every `interval` ticks, waiting while max_alive enemies are alive, and
+    ends on the first spawn tick after `duration` that finds the field clear; the
+    next wave starts wave_delay ticks after that. Between events nothing has to be
+    polled, so idle stretches can be skipped with next_event_tick().
+    """
+
+    def __init__(self, start_delay: int, wave_delay: int, wave_duration: int,
+                 make_wave: Callable[[int, int], WaveSpec] = default_wave):
+        self.make_wave = make_wave
+        self.wave_delay = wave_delay
+        self.wave_duration = wave_duration
+        self.now = 0
+        self.queue: List[Tuple[int, int, int]] = []
+        self.order = itertools.count()
+        self.spec = None
+        self.end_tick = 0
+        self.wave_active = False
+        self.push(start_delay, WAVE_START)
+
+    def push(self, tick: int, kind: int):
+        heapq.heappush(self.queue, (tick, next(self.order), kind))
+
+    def next_event_tick(self) -> int:
+        return self.queue[0][0] if self.queue else -1
+
+    def countdown(self) -> int:
+        """Ticks left in the running wave (negative once overdue) or until the next one starts."""
+        if self.wave_active:
+            return self.end_tick - self.now
+        return max(self.next_event_tick() - self.now, 0) if self.queue else 0
+
+    def tick(self, game):
+        """Handle every event due now."""
+        while self.queue and self.queue[0][0] <= self.now:
+            _, _, kind = heapq.heappop(self.queue)
+            if kind == WAVE_START:
+                self.spec = self.make_wave(game.wave, self.wave_duration)
+                # The wave's clock and its first spawn start on the next tick
+                self.end_tick = self.now + 1 + self.spec.duration
+                self.wave_active = True
+                game.game_started = True
+                game.wave_in_progress = True
+                self.push(self.now + 1, SPAWN)
+            elif len(game.enemies) == 0 and self.now >= self.end_tick:
+                self.wave_active = False
+                game.wave_in_progress = False
+                game.wave += 1
+                game.money += self.spec.bonus
+                self.push(self.now + self.wave_delay + 1, WAVE_START)
+            elif len(game.enemies) < self.spec.max_alive:
+                game.add_enemy(self.spec.enemy_type(game.rng))
+                self.push(self.now + self.spec.interval, SPAWN)
+            else:
+                # Field full: spawn as soon as there is room again
+                self.push(self.now + 1, SPAWN)
+        self.now += 1
+        game.wave_countdown = self.countdown()